@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class LRUCache:
+    """Thread-safe in-process cache that evicts the least recently used entry"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class VersionedCache(LRUCache):
+    """LRU cache keyed by (id, version); invalidating an id bumps its version"""
+
+    def __init__(self, max_entries: int = 256):
+        super().__init__(max_entries)
+        self._versions: Dict[Hashable, int] = {}
+
+    def version(self, item_id: Hashable) -> int:
+        return self._versions.get(item_id, 0)
+
+    def get(self, item_id: Hashable, default: Any = None) -> Any:
+        return super().get((item_id, self.version(item_id)), default)
+
+    def set(self, item_id: Hashable, value: Any, version: Optional[int] = None):
+        """Store a value; pass the version read before loading it so a concurrent
+        invalidation leaves the stale value under the old version"""
+        if version is None:
+            version = self.version(item_id)
+        super().set((item_id, version), value)
+
+    def invalidate(self, item_id: Hashable):
+        """Drop the current entry and move the id on to a new version"""
+        with self._lock:
+            version = self._versions.get(item_id, 0)
+            self._data.pop((item_id, version), None)
+            self._versions[item_id] = version + 1
+
+class TTLCache(VersionedCache):
+    """Versioned cache whose entries also expire ``ttl_seconds`` after being set"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        super().__init__(max_entries)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, item_id: Hashable, default: Any = None) -> Any:
+        entry = super().get(item_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            return default
+        return entry[1]
+
+    def set(self, item_id: Hashable, value: Any, version: Optional[int] = None):
+        super().set(item_id, (time.monotonic(), value), version)
@@ -23,6 +23,31 @@ class Settings:
     APP_NAME: str = "Online Learning Platform"
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     
+    # Caching
+    ANSWER_KEY_CACHE_SIZE: int = int(os.getenv("ANSWER_KEY_CACHE_SIZE", "512"))
+    VISIBILITY_CACHE_SIZE: int = int(os.getenv("VISIBILITY_CACHE_SIZE", "4096"))
+    QUIZ_PAYLOAD_CACHE_SIZE: int = int(os.getenv("QUIZ_PAYLOAD_CACHE_SIZE", "256"))
+    ITEM_ANALYSIS_CACHE_SIZE: int = int(os.getenv("ITEM_ANALYSIS_CACHE_SIZE", "64"))
+    TEACHER_OVERVIEW_CACHE_SIZE: int = int(os.getenv("TEACHER_OVERVIEW_CACHE_SIZE", "1024"))
+    TEACHER_OVERVIEW_CACHE_SECONDS: float = float(os.getenv("TEACHER_OVERVIEW_CACHE_SECONDS", "30"))
+    LEADERBOARD_CACHE_SIZE: int = int(os.getenv("LEADERBOARD_CACHE_SIZE", "1024"))
+    
+    # Verbose request logging on the dashboard endpoints
+    DASHBOARD_DEBUG: bool = os.getenv("DASHBOARD_DEBUG", "False").lower() == "true"
+    
+    # Quiz submission intake: "sync" grades in the request, "async" queues it
+    SUBMISSION_INTAKE_MODE: str = os.getenv("SUBMISSION_INTAKE_MODE", "sync").lower()
+    SUBMISSION_WORKERS: int = int(os.getenv("SUBMISSION_WORKERS", "4"))
+    
+    # Timed quizzes: attempts are closed this long after their time limit runs out
+    QUIZ_DEADLINE_GRACE_SECONDS: int = int(os.getenv("QUIZ_DEADLINE_GRACE_SECONDS", "30"))
+    
+    # Quiz autosave: buffered answers are written at most this often, or sooner
+    # once this many are waiting
+    AUTOSAVE_FLUSH_SECONDS: float = float(os.getenv("AUTOSAVE_FLUSH_SECONDS", "2"))
+    AUTOSAVE_FLUSH_BATCH: int = int(os.getenv("AUTOSAVE_FLUSH_BATCH", "1000"))
+    AUTOSAVE_ATTEMPT_CACHE_SIZE: int = int(os.getenv("AUTOSAVE_ATTEMPT_CACHE_SIZE", "4096"))
+    
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
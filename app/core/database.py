@@ -8,6 +8,14 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def upsert_insert(db, model):
+    """INSERT construct supporting on_conflict_do_update for the session's dialect"""
+    if db.bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -21,10 +29,10 @@ def import_models():
     """Import all models to register them with SQLAlchemy"""
     try:
         from ..models.user import User
-        from ..models.quiz import Quiz, Question, QuizAttempt, QuizSubmission
+        from ..models.quiz import Quiz, Question, QuizAttempt, QuizSubmission, QuizStats, QuestionStats, QueuedSubmission, RegradeJob, AttemptAnswer
         from ..models.assignment import Assignment, AssignmentSubmission
-        from ..models.announcement import Announcement
-        from ..models.performance import PerformanceRecord
+        from ..models.announcement import Announcement, Notification, NotificationOutbox
+        from ..models.performance import PerformanceRecord, StudentSubjectStats, PerformanceDaily
         # Note: Subject models are intentionally excluded to avoid import issues
         print("✅ All models imported successfully")
     except Exception as e:
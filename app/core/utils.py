@@ -1,5 +1,9 @@
+import base64
+import json
 import random
 import string
+from datetime import datetime, timezone
+from typing import Any, List, Optional
 from sqlalchemy.orm import Session
 from ..models.user import User
 
@@ -42,21 +46,21 @@ def find_tutor_by_code(db: Session, tutor_code: str) -> User:
         User.is_active == True
     ).first()
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a timestamp to naive UTC (naive values are assumed to be UTC already)"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque pagination cursor holding the sort key of the last row returned"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Optional[List[Any]]:
+    """Sort key from a cursor made by encode_cursor, or None if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
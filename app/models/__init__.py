@@ -1,8 +1,8 @@
 from .user import User
-from .quiz import Quiz, Question, QuizAttempt, QuizSubmission
+from .quiz import Quiz, Question, QuizAttempt, QuizSubmission, QuizStats, QuestionStats, QueuedSubmission, RegradeJob, AttemptAnswer
 from .assignment import Assignment, AssignmentSubmission
-from .announcement import Announcement
-from .performance import PerformanceRecord
+from .announcement import Announcement, Notification, NotificationOutbox
+from .performance import PerformanceRecord, StudentSubjectStats, PerformanceDaily
 from .subject import Subject, Grade, StudentGrade
 from .assessment import FormalAssessment, FormalSubmission
 
@@ -12,10 +12,19 @@ __all__ = [
     "Question",
     "QuizAttempt",
     "QuizSubmission",
+    "QuizStats",
+    "QuestionStats",
+    "QueuedSubmission",
+    "RegradeJob",
+    "AttemptAnswer",
     "Assignment",
     "AssignmentSubmission", 
     "Announcement",
+    "Notification",
+    "NotificationOutbox",
     "PerformanceRecord",
+    "StudentSubjectStats",
+    "PerformanceDaily",
     "Subject",
     "Grade",
     "StudentGrade",
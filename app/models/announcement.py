@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
@@ -35,3 +35,16 @@ class Notification(Base):
     
     # Relationship
     recipient = relationship("User", foreign_keys=[recipient_id])
+
+class NotificationOutbox(Base):
+    """Notifications written in the same transaction as the change they announce
+    and delivered after the request has returned"""
+    __tablename__ = "notification_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)  # quiz_created
+    payload = Column(JSON, nullable=False)
+    status = Column(String, default="pending", index=True)  # pending, processing, sent, failed
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True))
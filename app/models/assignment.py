@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
 
 class Assignment(Base):
     __tablename__ = "assignments"
+    __table_args__ = (
+        # A tutor's assignments by due date, for students' upcoming deadlines
+        Index("ix_assignments_creator_due", "creator_id", "due_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -31,6 +35,10 @@ class Assignment(Base):
 
 class AssignmentSubmission(Base):
     __tablename__ = "assignment_submissions"
+    __table_args__ = (
+        # Has this student submitted this assignment?
+        Index("ix_assignment_submissions_student_assignment", "student_id", "assignment_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text)
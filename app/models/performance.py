@@ -1,15 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
 
 class PerformanceRecord(Base):
     __tablename__ = "performance_records"
+    __table_args__ = (
+        # A student's records by recency, for per-student dashboard windows
+        Index("ix_performance_records_student_created", "student_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     subject = Column(String, nullable=False)
     assessment_type = Column(String, nullable=False)  # quiz, assignment, etc.
     assessment_id = Column(Integer, nullable=False)  # ID of quiz or assignment
+    attempt_id = Column(Integer, index=True)  # Quiz attempt the record was created from
     score = Column(Float, nullable=False)
     max_score = Column(Float, nullable=False)
     percentage = Column(Float, nullable=False)
@@ -24,3 +29,52 @@ class PerformanceRecord(Base):
     
     # Relationships
     student = relationship("User", back_populates="performance_records")
+
+class StudentSubjectStats(Base):
+    """Running totals of a student's results in one subject, kept in step
+    with performance_records on every write.
+
+    recent_average is an exponentially weighted average of the percentages,
+    so it follows the student's latest results.
+    """
+    __tablename__ = "student_subject_stats"
+
+    student_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    subject = Column(String, primary_key=True)
+    assessment_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    percentage_sum = Column(Float, nullable=False, default=0.0)
+    best_percentage = Column(Float)
+    worst_percentage = Column(Float)
+    recent_average = Column(Float)
+    last_assessment_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def average(self) -> float:
+        return self.percentage_sum / self.assessment_count if self.assessment_count else 0.0
+
+class PerformanceDaily(Base):
+    """Results per teacher, subject and UTC day, for analytics over a date range.
+
+    Holds count, sum and sum of squares of the percentages (mean and spread)
+    plus the best and worst result and the easy/medium/hard band totals.
+    The key is declared (tutor_id, day, subject) so a teacher's date range
+    is one index range.
+    """
+    __tablename__ = "performance_daily"
+
+    tutor_id = Column(Integer, ForeignKey("users.id"), primary_key=True)  # Teacher who set the assessments
+    day = Column(Date, primary_key=True)
+    subject = Column(String, primary_key=True)
+    assessment_count = Column(Integer, nullable=False, default=0)
+    percentage_sum = Column(Float, nullable=False, default=0.0)
+    percentage_sq_sum = Column(Float, nullable=False, default=0.0)
+    best_percentage = Column(Float, nullable=False)
+    worst_percentage = Column(Float, nullable=False)
+    easy_count = Column(Integer, nullable=False, default=0)
+    easy_sum = Column(Float, nullable=False, default=0.0)
+    medium_count = Column(Integer, nullable=False, default=0)
+    medium_sum = Column(Float, nullable=False, default=0.0)
+    hard_count = Column(Integer, nullable=False, default=0)
+    hard_sum = Column(Float, nullable=False, default=0.0)
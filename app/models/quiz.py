@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean, JSON, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -19,6 +19,7 @@ class Quiz(Base):
     subject = Column(String, nullable=False)
     time_limit = Column(Integer)  # in minutes
     passing_score = Column(Float, default=60.0)
+    questions_per_attempt = Column(Integer)  # draw this many questions per attempt; all when empty
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -34,43 +35,88 @@ class Quiz(Base):
     grade = relationship("Grade", back_populates="quizzes")
     questions = relationship("Question", back_populates="quiz", cascade="all, delete-orphan")
     attempts = relationship("QuizAttempt", back_populates="quiz", cascade="all, delete-orphan")
+    stats = relationship("QuizStats", uselist=False, cascade="all, delete-orphan")
+    regrade_jobs = relationship("RegradeJob", cascade="all, delete-orphan")
+    queued_submissions = relationship("QueuedSubmission", cascade="all, delete-orphan")
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # Question bank strata: a quiz's questions by topic and difficulty
+        Index("ix_questions_bank", "quiz_id", "topic", "difficulty"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
     question_type = Column(Enum(QuestionType), nullable=False)
     options = Column(JSON)  # For multiple choice questions
     correct_answer = Column(Text, nullable=False)
+    accepted_answers = Column(JSON)  # Other accepted answers; key points for essays
+    numeric_tolerance = Column(Float)  # Absolute tolerance for numeric short answers
+    max_edit_distance = Column(Integer)  # Typos tolerated in short answers
     points = Column(Float, default=1.0)
     explanation = Column(Text)  # For feedback
+    topic = Column(String)  # Topic tag used to stratify question draws
+    difficulty = Column(String)  # easy, medium, hard
     
     # Foreign Keys
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False, index=True)
     
     # Relationships
     quiz = relationship("Quiz", back_populates="questions")
     submissions = relationship("QuizSubmission", back_populates="question", cascade="all, delete-orphan")
+    stats = relationship("QuestionStats", uselist=False, cascade="all, delete-orphan")
+    saved_answers = relationship("AttemptAnswer", cascade="all, delete-orphan")
 
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
+    __table_args__ = (
+        # At most one open attempt per student and quiz; backs the start_quiz upsert
+        Index(
+            "uq_quiz_attempts_open", "quiz_id", "student_id",
+            unique=True,
+            postgresql_where=text("completed_at IS NULL"),
+            sqlite_where=text("completed_at IS NULL")
+        ),
+        # Open timed attempts by deadline; the deadline scheduler rebuilds from it
+        Index(
+            "ix_quiz_attempts_open_expiry", "expires_at",
+            postgresql_where=text("completed_at IS NULL AND expires_at IS NOT NULL"),
+            sqlite_where=text("completed_at IS NULL AND expires_at IS NOT NULL")
+        ),
+        # Keyset pagination of a quiz's attempts by score
+        Index("ix_quiz_attempts_quiz_score", "quiz_id", "score", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     started_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True))  # started_at + quiz time limit
+    question_ids = Column(JSON)  # questions drawn for this attempt; all of the quiz's when empty
     completed_at = Column(DateTime(timezone=True))
     score = Column(Float)
     is_passed = Column(Boolean)
     time_taken = Column(Integer)  # in seconds
+    counted_unanswered = Column(Boolean, default=False)  # scored out of every drawn question (closed at its deadline)
     
     # Foreign Keys
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relationships
     quiz = relationship("Quiz", back_populates="attempts")
     student = relationship("User", back_populates="quiz_attempts")
     submissions = relationship("QuizSubmission", back_populates="attempt", cascade="all, delete-orphan")
+    saved_answers = relationship("AttemptAnswer", cascade="all, delete-orphan")
+
+class AttemptAnswer(Base):
+    """Latest autosaved answer per question of an open attempt, written by the
+    autosave buffer and cleared when the attempt is submitted"""
+    __tablename__ = "attempt_answers"
+    
+    attempt_id = Column(Integer, ForeignKey("quiz_attempts.id"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    answer = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class QuizSubmission(Base):
     __tablename__ = "quiz_submissions"
@@ -82,9 +128,60 @@ class QuizSubmission(Base):
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Foreign Keys
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
-    attempt_id = Column(Integer, ForeignKey("quiz_attempts.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    attempt_id = Column(Integer, ForeignKey("quiz_attempts.id"), nullable=False, index=True)
     
     # Relationships
     question = relationship("Question", back_populates="submissions")
     attempt = relationship("QuizAttempt", back_populates="submissions")
+
+class QuizStats(Base):
+    """Running totals of completed attempts, maintained by submit_quiz"""
+    __tablename__ = "quiz_stats"
+    
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), primary_key=True)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    pass_count = Column(Integer, nullable=False, default=0)
+    time_sum = Column(Integer, nullable=False, default=0)  # in seconds
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class QuestionStats(Base):
+    """Running answer/correct counts per question, maintained by submit_quiz"""
+    __tablename__ = "question_stats"
+    
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False, index=True)
+    answer_count = Column(Integer, nullable=False, default=0)
+    correct_count = Column(Integer, nullable=False, default=0)
+
+class QueuedSubmission(Base):
+    """Quiz submission accepted by async intake and waiting to be graded"""
+    __tablename__ = "submission_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    receipt = Column(String, unique=True, index=True, nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    answers = Column(JSON, nullable=False)  # [{"question_id": ..., "answer": ...}]
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, processing, graded, failed
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+class RegradeJob(Base):
+    """Regrade of a quiz's completed attempts after its answer key changed"""
+    __tablename__ = "regrade_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False, index=True)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    total_attempts = Column(Integer, default=0)
+    processed_attempts = Column(Integer, default=0)
+    changed_attempts = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
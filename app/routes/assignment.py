@@ -14,6 +14,8 @@ from ..schemas.assignment import (
     AssignmentGrade, AssignmentAnalytics
 )
 from ..services.email_service import send_assignment_notification, send_grade_notification
+from ..services.performance_stats import record_performance
+from ..services.teacher_overview import invalidate_teacher_overview
 
 router = APIRouter()
 
@@ -62,6 +64,7 @@ def create_assignment(
     db.add(assignment)
     db.commit()
     db.refresh(assignment)
+    invalidate_teacher_overview(current_teacher.id)
     
     # Notify students about new assignment
     students = db.query(User).filter(User.role == "student", User.is_active == True).all()
@@ -137,6 +140,7 @@ def update_assignment(
     
     db.commit()
     db.refresh(assignment)
+    invalidate_teacher_overview(current_teacher.id)
     return assignment
 
 @router.delete("/{assignment_id}")
@@ -155,6 +159,7 @@ def delete_assignment(
     
     db.delete(assignment)
     db.commit()
+    invalidate_teacher_overview(current_teacher.id)
     return {"message": "Assignment deleted successfully"}
 
 @router.post("/{assignment_id}/toggle")
@@ -173,6 +178,7 @@ def toggle_assignment_status(
     
     assignment.is_active = not assignment.is_active
     db.commit()
+    invalidate_teacher_overview(current_teacher.id)
     
     status = "activated" if assignment.is_active else "deactivated"
     return {"message": f"Assignment {status} successfully"}
@@ -300,9 +306,10 @@ def grade_assignment(
         weaknesses=[],
         recommendations=grade_data.feedback or f"Keep working on {assignment.subject} concepts."
     )
-    db.add(performance_record)
+    record_performance(db, assignment.creator_id, performance_record)
     
     db.commit()
+    invalidate_teacher_overview(current_teacher.id)
     
     # Send email notification to student
     student = db.query(User).filter(User.id == submission.student_id).first()
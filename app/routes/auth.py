@@ -6,6 +6,8 @@ from ..core.auth import get_current_user
 from ..core.utils import generate_unique_tutor_code, find_tutor_by_code
 from ..models.user import User
 from ..schemas.user import UserCreate, UserRead, UserLogin, Token, UserUpdate, ConnectTutorRequest
+from ..services.leaderboard import leaderboards
+from ..services.teacher_overview import invalidate_teacher_overview
 
 router = APIRouter()
 
@@ -87,6 +89,8 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        if tutor_id is not None:
+            invalidate_teacher_overview(tutor_id)
         
         print("=== REGISTRATION SUCCESS ===")
         return db_user
@@ -184,8 +188,13 @@ def connect_tutor(req: ConnectTutorRequest, current_user: User = Depends(get_cur
             detail="Invalid tutor code. Please check with your tutor."
         )
         
+    previous_tutor_id = current_user.tutor_id
     current_user.tutor_id = tutor.id
     db.commit()
+    for tutor_id in (previous_tutor_id, tutor.id):
+        if tutor_id is not None:
+            invalidate_teacher_overview(tutor_id)
+    leaderboards.invalidate(previous_tutor_id, tutor.id)
     
     return {
         "success": True,
@@ -270,6 +279,7 @@ def update_current_user(
     db: Session = Depends(get_db)
 ):
     """Update current user information"""
+    previous_tutor_id = current_user.tutor_id
     if user_update.name is not None:
         current_user.name = user_update.name
     if user_update.email is not None:
@@ -303,4 +313,10 @@ def update_current_user(
     
     db.commit()
     db.refresh(current_user)
+    if current_user.role == "student":
+        # Name, activity and tutor all change how the student's cohort boards look
+        for tutor_id in (previous_tutor_id, current_user.tutor_id):
+            if tutor_id is not None:
+                invalidate_teacher_overview(tutor_id)
+        leaderboards.invalidate(previous_tutor_id, current_user.tutor_id)
     return current_user
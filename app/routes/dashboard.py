@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_
+from sqlalchemy import Integer, func, desc, and_, case, cast, select
+import math
 from typing import List, Optional
 from datetime import datetime, timedelta
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.utils import as_naive_utc
 from ..core.auth import get_current_teacher, get_current_user, get_current_student
 from ..models.user import User
 from ..models.quiz import Quiz, QuizAttempt
 from ..models.assignment import Assignment, AssignmentSubmission
 from ..models.announcement import Announcement
-from ..models.performance import PerformanceRecord
+from ..models.performance import PerformanceRecord, PerformanceDaily, StudentSubjectStats
 from ..schemas.performance import StudentPerformance, LeaderboardEntry, DiagnosticReport
+from ..services.leaderboard import leaderboards
+from ..services.teacher_overview import get_overview_for_teacher, invalidate_teacher_overview
 from ..schemas.dashboard import (
     TeacherDashboard, StudentDashboard, 
     PerformanceAnalytics, SubjectAnalytics,
@@ -195,9 +200,14 @@ def assign_student_to_tutor(
         )
     
     # Update student's tutor assignment
+    previous_tutor_id = student.tutor_id
     student.tutor_id = current_teacher.id
     db.commit()
     db.refresh(student)
+    for tutor_id in (previous_tutor_id, current_teacher.id):
+        if tutor_id is not None:
+            invalidate_teacher_overview(tutor_id)
+    leaderboards.invalidate(previous_tutor_id, current_teacher.id)
     
     return {
         "message": f"Student {student.name} successfully assigned to you",
@@ -233,6 +243,8 @@ def unassign_student_from_tutor(
     student.tutor_id = None
     db.commit()
     db.refresh(student)
+    invalidate_teacher_overview(current_teacher.id)
+    leaderboards.invalidate(current_teacher.id, None)
     
     return {
         "message": f"Student {student.name} successfully unassigned from you",
@@ -252,108 +264,10 @@ def get_teacher_overview(
 ):
     """Get comprehensive teacher dashboard overview"""
     try:
-        print(f"=== TEACHER DASHBOARD DEBUG ===")
-        print(f"Teacher ID: {current_teacher.id}")
-        print(f"Teacher Name: {current_teacher.name}")
-        print(f"Teacher Role: {current_teacher.role}")
+        result = get_overview_for_teacher(db, current_teacher.id)
         
-        # Debug: Check all users in the database
-        all_users = db.query(User).all()
-        print(f"Total users in database: {len(all_users)}")
-        for user in all_users:
-            print(f"User: ID={user.id}, Name={user.name}, Email={user.email}, Role={user.role}, Active={user.is_active}")
-        
-        # Count students with debugging - filter by tutor
-        students_query = db.query(User).filter(
-            User.role == "student", 
-            User.is_active == True,
-            User.tutor_id == current_teacher.id
-        )
-        print(f"Student query filter: role='student' AND is_active=True AND tutor_id={current_teacher.id}")
-        
-        # Check each condition separately
-        all_students = db.query(User).filter(User.role == "student").all()
-        print(f"Users with role='student': {len(all_students)}")
-        for student in all_students:
-            print(f"Student: ID={student.id}, Name={student.name}, Active={student.is_active}, Tutor ID={student.tutor_id}")
-        
-        active_students = db.query(User).filter(User.is_active == True).all()
-        print(f"Users with is_active=True: {len(active_students)}")
-        for user in active_students:
-            print(f"Active user: ID={user.id}, Name={user.name}, Role={user.role}")
-        
-        my_students = db.query(User).filter(
-            User.role == "student",
-            User.tutor_id == current_teacher.id
-        ).all()
-        print(f"My students: {len(my_students)}")
-        for student in my_students:
-            print(f"My student: ID={student.id}, Name={student.name}, Active={student.is_active}")
-        
-        total_students = students_query.count()
-        print(f"Final student count: {total_students}")
-        
-        # Count active quizzes and assignments
-        total_quizzes = db.query(Quiz).filter(
-            Quiz.creator_id == current_teacher.id,
-            Quiz.is_active == True
-        ).count()
-        
-        total_assignments = db.query(Assignment).filter(
-            Assignment.creator_id == current_teacher.id,
-            Assignment.is_active == True
-        ).count()
-        
-        # Count recent submissions - simplified without joins
-        try:
-            recent_quiz_attempts = db.query(QuizAttempt).filter(
-                QuizAttempt.quiz_id.in_(
-                    db.query(Quiz.id).filter(Quiz.creator_id == current_teacher.id)
-                ),
-                QuizAttempt.completed_at != None
-            ).count()
-        except Exception as quiz_error:
-            print(f"Quiz attempts calculation error: {quiz_error}")
-            recent_quiz_attempts = 0
-            
-        try:
-            recent_assignment_submissions = db.query(AssignmentSubmission).filter(
-                AssignmentSubmission.assignment_id.in_(
-                    db.query(Assignment.id).filter(Assignment.creator_id == current_teacher.id)
-                )
-            ).count()
-        except Exception as assign_error:
-            print(f"Assignment submissions calculation error: {assign_error}")
-            recent_assignment_submissions = 0
-        
-        # Calculate average performance - simplified without join
-        try:
-            avg_performance = db.query(func.avg(PerformanceRecord.percentage)).filter(
-                PerformanceRecord.quiz_id.in_(
-                    db.query(Quiz.id).filter(Quiz.creator_id == current_teacher.id)
-                )
-            ).scalar() or 0
-        except Exception as perf_error:
-            print(f"Performance calculation error: {perf_error}")
-            avg_performance = 0
-        
-        # Simplified response without helper functions
-        result = {
-            "total_students": total_students,
-            "total_quizzes": total_quizzes,
-            "total_assignments": total_assignments,
-            "recent_quiz_attempts": recent_quiz_attempts,
-            "recent_assignment_submissions": recent_assignment_submissions,
-            "average_performance": round(avg_performance, 2),
-            "recent_activity": [],  # Simplified - empty array
-            "subject_breakdown": {}  # Simplified - empty object
-        }
-        
-        print(f"=== DASHBOARD SUMMARY ===")
-        print(f"Total students: {total_students}")
-        print(f"Total quizzes: {total_quizzes}")
-        print(f"Total assignments: {total_assignments}")
-        print(f"Result: {result}")
+        if settings.DASHBOARD_DEBUG:
+            print(f"=== TEACHER DASHBOARD === teacher={current_teacher.id} result={result}")
         
         return result
         
@@ -365,6 +279,9 @@ def get_teacher_overview(
         print(f"Traceback: {traceback.format_exc()}")
         raise
 
+# Assessments averaged into a student's recent trend
+RECENT_ASSESSMENTS = 5
+
 @router.get("/teacher/students", response_model=List[StudentPerformance])
 def get_student_performances(
     current_teacher: User = Depends(get_current_teacher),
@@ -372,64 +289,96 @@ def get_student_performances(
     subject: Optional[str] = None
 ):
     """Get detailed student performance data"""
-    query = db.query(User).filter(
-        User.role == "student", 
+    cohort = select(User.id).where(
+        User.role == "student",
         User.is_active == True,
         User.tutor_id == current_teacher.id
     )
-    
     if subject:
-        # Filter by subject if specified
-        query = query.join(PerformanceRecord).filter(PerformanceRecord.subject == subject)
+        # Students with results in the subject; their figures cover every subject
+        cohort = cohort.where(
+            select(PerformanceRecord.id).where(
+                PerformanceRecord.student_id == User.id,
+                PerformanceRecord.subject == subject
+            ).exists()
+        )
     
-    students = query.all()
+    # Number each student's records from the latest, so the recent trend is
+    # an aggregate over recency <= RECENT_ASSESSMENTS
+    records = select(
+        PerformanceRecord.student_id,
+        PerformanceRecord.subject,
+        PerformanceRecord.assessment_type,
+        PerformanceRecord.percentage,
+        PerformanceRecord.created_at,
+        func.row_number().over(
+            partition_by=PerformanceRecord.student_id,
+            order_by=(PerformanceRecord.created_at.desc(), PerformanceRecord.id.desc())
+        ).label("recency")
+    ).where(PerformanceRecord.student_id.in_(cohort)).subquery()
+    
+    is_recent = records.c.recency <= RECENT_ASSESSMENTS
+    is_quiz = records.c.assessment_type == "quiz"
+    is_assignment = records.c.assessment_type == "assignment"
+    
+    def per_student(aggregate):
+        """Roll a per-subject aggregate up to the whole student"""
+        return aggregate.over(partition_by=User.id)
+    
+    def per_student_count(aggregate):
+        """Roll a per-subject count up to the whole student; Postgres sums
+        integers as numeric, which would come back as Decimal"""
+        return cast(per_student(func.sum(aggregate)), Integer)
+    
+    # One row per (student, subject): the subject average plus the student's
+    # totals as window functions over the grouped rows
+    rows = db.query(
+        User.id,
+        User.name,
+        User.email,
+        records.c.subject,
+        func.avg(records.c.percentage).label("subject_average"),
+        per_student_count(func.count()).label("assessments"),
+        per_student(func.sum(func.sum(records.c.percentage))).label("percentage_total"),
+        per_student(func.max(func.max(records.c.percentage))).label("best"),
+        per_student(func.min(func.min(records.c.percentage))).label("worst"),
+        per_student(func.max(func.max(records.c.created_at))).label("last_assessment"),
+        per_student(func.sum(func.sum(case((is_recent, records.c.percentage), else_=0.0)))).label("recent_total"),
+        per_student_count(func.sum(case((is_recent, 1), else_=0))).label("recent_count"),
+        per_student_count(func.sum(case((is_quiz, 1), else_=0))).label("quizzes"),
+        per_student(func.sum(func.sum(case((is_quiz, records.c.percentage), else_=0.0)))).label("quiz_total"),
+        per_student_count(func.sum(case((is_assignment, 1), else_=0))).label("assignments"),
+        per_student(func.sum(func.sum(case((is_assignment, records.c.percentage), else_=0.0)))).label("assignment_total")
+    ).join(records, records.c.student_id == User.id).group_by(
+        User.id, User.name, User.email, records.c.subject
+    ).all()
     
-    performances = []
-    for student in students:
-        # Get student's performance records
-        performance_records = db.query(PerformanceRecord).filter(
-            PerformanceRecord.student_id == student.id
-        ).all()
-        
-        if not performance_records:
-            continue
-        
-        # Calculate statistics
-        total_assessments = len(performance_records)
-        average_percentage = sum(r.percentage for r in performance_records) / total_assessments
-        best_score = max(r.percentage for r in performance_records)
-        worst_score = min(r.percentage for r in performance_records)
-        
-        # Get recent performance trend
-        recent_records = sorted(performance_records, key=lambda x: x.created_at, reverse=True)[:5]
-        recent_average = sum(r.percentage for r in recent_records) / len(recent_records)
-        
-        # Get subject breakdown
-        subject_performance = {}
-        for record in performance_records:
-            if record.subject not in subject_performance:
-                subject_performance[record.subject] = []
-            subject_performance[record.subject].append(record.percentage)
-        
-        subject_averages = {
-            subject: sum(scores) / len(scores) 
-            for subject, scores in subject_performance.items()
-        }
-        
-        performances.append(StudentPerformance(
-            student_id=student.id,
-            student_name=student.name,
-            student_email=student.email,
-            total_assessments=total_assessments,
-            average_percentage=round(average_percentage, 2),
-            best_score=round(best_score, 2),
-            worst_score=round(worst_score, 2),
-            recent_trend=round(recent_average, 2),
-            subject_breakdown=subject_averages,
-            last_assessment=performance_records[-1].created_at if performance_records else None
-        ))
-    
-    return sorted(performances, key=lambda x: x.average_percentage, reverse=True)
+    performances = {}
+    for row in rows:
+        performance = performances.get(row.id)
+        if performance is None:
+            performance = performances[row.id] = StudentPerformance(
+                student_id=row.id,
+                student_name=row.name,
+                student_email=row.email,
+                total_assessments=row.assessments,
+                total_quizzes=row.quizzes,
+                total_assignments=row.assignments,
+                average_quiz_score=round(row.quiz_total / row.quizzes, 2) if row.quizzes else 0.0,
+                average_assignment_score=round(row.assignment_total / row.assignments, 2) if row.assignments else 0.0,
+                overall_percentage=round(row.percentage_total / row.assessments, 2),
+                best_score=round(row.best, 2),
+                worst_score=round(row.worst, 2),
+                recent_trend=round(row.recent_total / row.recent_count, 2) if row.recent_count else 0.0,
+                last_assessment=row.last_assessment
+            )
+        performance.subject_breakdown[row.subject] = round(row.subject_average, 2)
+    
+    performances = list(performances.values())
+    performances.sort(key=lambda performance: performance.overall_percentage, reverse=True)
+    for rank, performance in enumerate(performances, start=1):
+        performance.rank = rank
+    return performances
 
 @router.get("/teacher/analytics", response_model=PerformanceAnalytics)
 def get_performance_analytics(
@@ -438,15 +387,15 @@ def get_performance_analytics(
     days: int = 30
 ):
     """Get detailed performance analytics"""
-    start_date = datetime.utcnow() - timedelta(days=days)
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
     
-    # Get performance records for teacher's content
-    performance_records = db.query(PerformanceRecord).join(Quiz).filter(
-        Quiz.creator_id == current_teacher.id,
-        PerformanceRecord.created_at >= start_date
-    ).all()
+    # Daily rollups of results on the teacher's quizzes and assignments
+    daily = db.query(PerformanceDaily).filter(
+        PerformanceDaily.tutor_id == current_teacher.id,
+        PerformanceDaily.day >= start_day
+    ).order_by(PerformanceDaily.day, PerformanceDaily.subject).all()
     
-    if not performance_records:
+    if not daily:
         return {
             "total_assessments": 0,
             "average_performance": 0,
@@ -456,17 +405,17 @@ def get_performance_analytics(
         }
     
     # Calculate overall statistics
-    total_assessments = len(performance_records)
-    average_performance = sum(r.percentage for r in performance_records) / total_assessments
+    total_assessments = sum(row.assessment_count for row in daily)
+    average_performance = sum(row.percentage_sum for row in daily) / total_assessments
     
     # Get performance trend over time
-    performance_trend = get_performance_trend(performance_records, days)
+    performance_trend = get_performance_trend(daily)
     
     # Get subject analytics
-    subject_analytics = get_subject_analytics(performance_records)
+    subject_analytics = get_subject_analytics(daily)
     
     # Get difficulty analysis
-    difficulty_analysis = get_difficulty_analysis(performance_records)
+    difficulty_analysis = get_difficulty_analysis(daily)
     
     return {
         "total_assessments": total_assessments,
@@ -478,18 +427,22 @@ def get_performance_analytics(
 
 # ==================== STUDENT DASHBOARD ====================
 
+# Deadlines listed on the student overview
+UPCOMING_DEADLINES_LIMIT = 10
+# Percentage points the recent average must move from the overall one to
+# count as a trend
+TREND_MARGIN = 2.0
+
 @router.get("/student/overview", response_model=StudentDashboard)
 def get_student_overview(
     current_student: User = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive student dashboard overview"""
-    # Get student's performance records
-    performance_records = db.query(PerformanceRecord).filter(
-        PerformanceRecord.student_id == current_student.id
-    ).all()
+    # One rollup row per subject the student has results in
+    subject_stats = get_subject_stats(current_student.id, db)
     
-    if not performance_records:
+    if not subject_stats:
         return {
             "total_assessments": 0,
             "average_percentage": 0,
@@ -501,30 +454,22 @@ def get_student_overview(
         }
     
     # Calculate basic statistics
-    total_assessments = len(performance_records)
-    average_percentage = sum(r.percentage for r in performance_records) / total_assessments
-    best_score = max(r.percentage for r in performance_records)
+    total_assessments, average_percentage, best_score = summarize_subject_stats(subject_stats)
     
     # Get current rank
-    current_rank = get_student_rank(current_student.id, db)
+    current_rank = get_student_rank(current_student, db)
     
     # Get recent performance
-    recent_performance = sorted(performance_records, key=lambda x: x.created_at, reverse=True)[:10]
+    recent_performance = get_recent_records(current_student.id, db, 10)
     
     # Get subject breakdown
-    subject_breakdown = {}
-    for record in performance_records:
-        if record.subject not in subject_breakdown:
-            subject_breakdown[record.subject] = []
-        subject_breakdown[record.subject].append(record.percentage)
-    
     subject_averages = {
-        subject: round(sum(scores) / len(scores), 2)
-        for subject, scores in subject_breakdown.items()
+        stats.subject: round(stats.average, 2)
+        for stats in subject_stats
     }
     
     # Get upcoming deadlines
-    upcoming_deadlines = get_upcoming_deadlines(current_student.id, db)
+    upcoming_deadlines = get_upcoming_deadlines(current_student, db)
     
     return {
         "total_assessments": total_assessments,
@@ -552,53 +497,49 @@ def get_student_performance(
     db: Session = Depends(get_db)
 ):
     """Get detailed student performance report"""
-    performance_records = db.query(PerformanceRecord).filter(
-        PerformanceRecord.student_id == current_student.id
-    ).all()
+    subject_stats = get_subject_stats(current_student.id, db)
     
-    if not performance_records:
+    if not subject_stats:
         return {
+            "student_id": current_student.id,
+            "student_name": current_student.name,
+            "subject": "all",
+            "overall_percentage": 0,
             "total_assessments": 0,
             "average_percentage": 0,
             "best_score": 0,
             "strengths": [],
             "weaknesses": [],
             "recommendations": ["Start taking assessments to track your progress"],
-            "recent_performance": []
+            "recent_performance": [],
+            "improvement_trend": "stable"
         }
     
     # Calculate statistics
-    total_assessments = len(performance_records)
-    average_percentage = sum(r.percentage for r in performance_records) / total_assessments
-    best_score = max(r.percentage for r in performance_records)
+    total_assessments, average_percentage, best_score = summarize_subject_stats(subject_stats)
     
     # Analyze strengths and weaknesses
-    strengths, weaknesses = analyze_performance(performance_records)
+    strengths, weaknesses = analyze_performance(subject_stats)
     
     # Generate recommendations
-    recommendations = generate_recommendations(performance_records, average_percentage)
+    recommendations = generate_recommendations(subject_stats, average_percentage)
     
     # Get recent performance
-    recent_performance = sorted(performance_records, key=lambda x: x.created_at, reverse=True)[:5]
+    recent_performance = get_recent_records(current_student.id, db, 5)
     
     return {
+        "student_id": current_student.id,
+        "student_name": current_student.name,
+        "subject": "all",
+        "overall_percentage": round(average_percentage, 2),
         "total_assessments": total_assessments,
         "average_percentage": round(average_percentage, 2),
         "best_score": round(best_score, 2),
         "strengths": strengths,
         "weaknesses": weaknesses,
         "recommendations": recommendations,
-        "recent_performance": [
-            {
-                "assessment_type": r.assessment_type,
-                "subject": r.subject,
-                "score": r.score,
-                "max_score": r.max_score,
-                "percentage": r.percentage,
-                "date": r.created_at
-            }
-            for r in recent_performance
-        ]
+        "recent_performance": recent_performance,
+        "improvement_trend": get_improvement_trend(subject_stats)
     }
 
 # ==================== LEADERBOARD ====================
@@ -610,53 +551,36 @@ def get_leaderboard(
     subject: Optional[str] = None,
     limit: int = 10
 ):
-    """Get class leaderboard"""
-    # Get students based on user role
-    if current_user.role == "teacher":
-        # Teachers see only their students
-        students = db.query(User).filter(
-            User.role == "student", 
-            User.is_active == True,
-            User.tutor_id == current_user.id
-        ).all()
-    else:
-        # Students see all students (or could be filtered by their tutor's students)
-        students = db.query(User).filter(User.role == "student", User.is_active == True).all()
-    
-    leaderboard_entries = []
-    for student in students:
-        # Get student's performance records
-        query = db.query(PerformanceRecord).filter(PerformanceRecord.student_id == student.id)
-        
-        if subject:
-            query = query.filter(PerformanceRecord.subject == subject)
-        
-        performance_records = query.all()
-        
-        if not performance_records:
-            continue
-        
-        # Calculate total score and average
-        total_score = sum(r.score for r in performance_records)
-        total_assessments = len(performance_records)
-        average_percentage = sum(r.percentage for r in performance_records) / total_assessments
-        
-        leaderboard_entries.append(LeaderboardEntry(
-            rank=0,  # Will be calculated after sorting
-            student_id=student.id,
-            student_name=student.name,
-            total_score=total_score,
-            total_assessments=total_assessments,
-            average_percentage=round(average_percentage, 2)
-        ))
-    
-    # Sort by average percentage and assign ranks
-    leaderboard_entries.sort(key=lambda x: x.average_percentage, reverse=True)
-    
-    for i, entry in enumerate(leaderboard_entries[:limit]):
-        entry.rank = i + 1
-    
-    return leaderboard_entries[:limit]
+    """Get class leaderboard for the user's tutor cohort"""
+    # Teachers see their own students, students the classmates sharing their tutor
+    tutor_id = current_user.id if current_user.role == "teacher" else current_user.tutor_id
+    standings = leaderboards.top(db, tutor_id, subject, limit)
+    return [leaderboard_entry(rank, standing) for rank, standing in enumerate(standings, start=1)]
+
+@router.get("/leaderboard/me", response_model=LeaderboardEntry)
+def get_my_leaderboard_position(
+    current_student: User = Depends(get_current_student),
+    db: Session = Depends(get_db),
+    subject: Optional[str] = None
+):
+    """Get the current student's position on their cohort's leaderboard"""
+    position = leaderboards.standing(db, current_student.tutor_id, subject, current_student.id)
+    if position is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No results recorded yet"
+        )
+    return leaderboard_entry(*position)
+
+def leaderboard_entry(rank: int, standing) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        rank=rank,
+        student_id=standing.student_id,
+        student_name=standing.student_name,
+        total_score=standing.score_sum,
+        total_assessments=standing.count,
+        average_percentage=round(standing.average, 2)
+    )
 
 # ==================== HELPER FUNCTIONS ====================
 
@@ -716,154 +640,163 @@ def get_subject_breakdown(teacher_id: int, db: Session) -> dict:
     
     return subject_counts
 
-def get_performance_trend(performance_records: List[PerformanceRecord], days: int) -> List[dict]:
-    """Get performance trend over time"""
-    # Group by date and calculate daily averages
-    daily_performance = {}
-    
-    for record in performance_records:
-        date_key = record.created_at.date()
-        if date_key not in daily_performance:
-            daily_performance[date_key] = []
-        daily_performance[date_key].append(record.percentage)
-    
-    # Calculate daily averages
-    trend_data = []
-    for date, percentages in sorted(daily_performance.items()):
-        trend_data.append({
-            "date": date,
-            "average_percentage": round(sum(percentages) / len(percentages), 2),
-            "count": len(percentages)
-        })
+def get_performance_trend(daily: List[PerformanceDaily]) -> List[dict]:
+    """Get performance trend over time from daily rollups"""
+    # Combine each day's subjects
+    daily_totals = {}
     
-    return trend_data
+    for row in daily:
+        totals = daily_totals.setdefault(row.day, [0, 0.0])
+        totals[0] += row.assessment_count
+        totals[1] += row.percentage_sum
+    
+    return [
+        {
+            "date": day,
+            "average_percentage": round(percentage_sum / count, 2),
+            "count": count
+        }
+        for day, (count, percentage_sum) in sorted(daily_totals.items())
+    ]
 
-def get_subject_analytics(performance_records: List[PerformanceRecord]) -> List[dict]:
-    """Get analytics by subject"""
+def get_subject_analytics(daily: List[PerformanceDaily]) -> List[dict]:
+    """Get analytics by subject from daily rollups"""
     subject_data = {}
     
-    for record in performance_records:
-        if record.subject not in subject_data:
-            subject_data[record.subject] = []
-        subject_data[record.subject].append(record.percentage)
+    for row in daily:
+        data = subject_data.get(row.subject)
+        if data is None:
+            subject_data[row.subject] = {
+                "count": row.assessment_count,
+                "sum": row.percentage_sum,
+                "sq_sum": row.percentage_sq_sum,
+                "best": row.best_percentage,
+                "worst": row.worst_percentage
+            }
+            continue
+        data["count"] += row.assessment_count
+        data["sum"] += row.percentage_sum
+        data["sq_sum"] += row.percentage_sq_sum
+        data["best"] = max(data["best"], row.best_percentage)
+        data["worst"] = min(data["worst"], row.worst_percentage)
     
     analytics = []
-    for subject, percentages in subject_data.items():
+    for subject, data in subject_data.items():
+        mean = data["sum"] / data["count"]
+        variance = max(data["sq_sum"] / data["count"] - mean * mean, 0.0)
         analytics.append({
             "subject": subject,
-            "average_percentage": round(sum(percentages) / len(percentages), 2),
-            "total_assessments": len(percentages),
-            "best_score": max(percentages),
-            "worst_score": min(percentages)
+            "average_percentage": round(mean, 2),
+            "total_assessments": data["count"],
+            "best_score": data["best"],
+            "worst_score": data["worst"],
+            "std_deviation": round(math.sqrt(variance), 2)
         })
     
     return analytics
 
-def get_difficulty_analysis(performance_records: List[PerformanceRecord]) -> dict:
-    """Analyze performance by difficulty level"""
-    # Categorize by performance level
-    easy = [r for r in performance_records if r.percentage >= 80]
-    medium = [r for r in performance_records if 60 <= r.percentage < 80]
-    hard = [r for r in performance_records if r.percentage < 60]
-    
-    return {
-        "easy": {
-            "count": len(easy),
-            "average": round(sum(r.percentage for r in easy) / len(easy), 2) if easy else 0
-        },
-        "medium": {
-            "count": len(medium),
-            "average": round(sum(r.percentage for r in medium) / len(medium), 2) if medium else 0
-        },
-        "hard": {
-            "count": len(hard),
-            "average": round(sum(r.percentage for r in hard) / len(hard), 2) if hard else 0
+def get_difficulty_analysis(daily: List[PerformanceDaily]) -> dict:
+    """Analyze performance by difficulty level from daily rollups"""
+    analysis = {}
+    for level in ("easy", "medium", "hard"):
+        count = sum(getattr(row, f"{level}_count") for row in daily)
+        total = sum(getattr(row, f"{level}_sum") for row in daily)
+        analysis[level] = {
+            "count": count,
+            "average": round(total / count, 2) if count else 0
         }
-    }
+    return analysis
 
-def get_student_rank(student_id: int, db: Session) -> int:
-    """Get student's current rank in class"""
-    # Get all students with their average performance
-    students = db.query(User).filter(User.role == "student", User.is_active == True).all()
-    
-    student_averages = []
-    for student in students:
-        performance_records = db.query(PerformanceRecord).filter(
-            PerformanceRecord.student_id == student.id
-        ).all()
-        
-        if performance_records:
-            average = sum(r.percentage for r in performance_records) / len(performance_records)
-            student_averages.append((student.id, average))
-    
-    # Sort by average and find rank
-    student_averages.sort(key=lambda x: x[1], reverse=True)
-    
-    for i, (sid, _) in enumerate(student_averages):
-        if sid == student_id:
-            return i + 1
-    
-    return 0
+def get_student_rank(student: User, db: Session) -> int:
+    """Get student's current rank among their tutor's students (0 without results)"""
+    position = leaderboards.standing(db, student.tutor_id, None, student.id)
+    return position[0] if position else 0
 
-def get_upcoming_deadlines(student_id: int, db: Session) -> List[dict]:
-    """Get upcoming assignment deadlines for student"""
-    # Get active assignments with due dates
-    assignments = db.query(Assignment).filter(
+def get_upcoming_deadlines(student: User, db: Session, limit: int = UPCOMING_DEADLINES_LIMIT) -> List[dict]:
+    """Get the student's next unsubmitted assignment deadlines from their tutor"""
+    now = datetime.utcnow()
+    submitted = select(AssignmentSubmission.id).where(
+        AssignmentSubmission.student_id == student.id,
+        AssignmentSubmission.assignment_id == Assignment.id
+    ).exists()
+    assignments = db.query(
+        Assignment.id, Assignment.title, Assignment.subject, Assignment.due_date
+    ).filter(
+        Assignment.creator_id == student.tutor_id,
         Assignment.is_active == True,
-        Assignment.due_date != None,
-        Assignment.due_date > datetime.utcnow()
-    ).all()
+        Assignment.due_date > now,
+        ~submitted
+    ).order_by(Assignment.due_date, Assignment.id).limit(limit).all()
     
-    deadlines = []
-    for assignment in assignments:
-        # Check if student has already submitted
-        submission = db.query(AssignmentSubmission).filter(
-            AssignmentSubmission.assignment_id == assignment.id,
-            AssignmentSubmission.student_id == student_id
-        ).first()
-        
-        if not submission:
-            deadlines.append({
-                "assignment_id": assignment.id,
-                "title": assignment.title,
-                "subject": assignment.subject,
-                "due_date": assignment.due_date,
-                "days_remaining": (assignment.due_date - datetime.utcnow()).days
-            })
-    
-    return sorted(deadlines, key=lambda x: x["due_date"])
-
-def analyze_performance(performance_records: List[PerformanceRecord]) -> tuple:
+    return [
+        {
+            "assignment_id": assignment.id,
+            "title": assignment.title,
+            "subject": assignment.subject,
+            "due_date": assignment.due_date,
+            "days_remaining": (as_naive_utc(assignment.due_date) - now).days
+        }
+        for assignment in assignments
+    ]
+
+def get_subject_stats(student_id: int, db: Session) -> List[StudentSubjectStats]:
+    """Get the student's per-subject rollup rows"""
+    return db.query(StudentSubjectStats).filter(
+        StudentSubjectStats.student_id == student_id,
+        StudentSubjectStats.assessment_count > 0
+    ).order_by(StudentSubjectStats.subject).all()
+
+def summarize_subject_stats(subject_stats: List[StudentSubjectStats]) -> tuple:
+    """Total assessments, overall average and best percentage across subjects"""
+    total_assessments = sum(stats.assessment_count for stats in subject_stats)
+    average_percentage = sum(stats.percentage_sum for stats in subject_stats) / total_assessments
+    best_score = max(stats.best_percentage for stats in subject_stats)
+    return total_assessments, average_percentage, best_score
+
+def get_recent_records(student_id: int, db: Session, limit: int) -> List[PerformanceRecord]:
+    """Get the student's latest performance records"""
+    return db.query(PerformanceRecord).filter(
+        PerformanceRecord.student_id == student_id
+    ).order_by(desc(PerformanceRecord.created_at), desc(PerformanceRecord.id)).limit(limit).all()
+
+def get_improvement_trend(subject_stats: List[StudentSubjectStats]) -> str:
+    """Compare recent results with the overall average, weighted by subject"""
+    total_assessments = sum(stats.assessment_count for stats in subject_stats)
+    shift = sum(
+        (stats.recent_average - stats.average) * stats.assessment_count
+        for stats in subject_stats
+    ) / total_assessments
+    
+    if shift > TREND_MARGIN:
+        return "improving"
+    if shift < -TREND_MARGIN:
+        return "declining"
+    return "stable"
+
+def analyze_performance(subject_stats: List[StudentSubjectStats]) -> tuple:
     """Analyze student performance to identify strengths and weaknesses"""
     strengths = []
     weaknesses = []
     
     # Analyze by subject
-    subject_performance = {}
-    for record in performance_records:
-        if record.subject not in subject_performance:
-            subject_performance[record.subject] = []
-        subject_performance[record.subject].append(record.percentage)
-    
-    for subject, percentages in subject_performance.items():
-        average = sum(percentages) / len(percentages)
-        if average >= 75:
-            strengths.append(f"Strong performance in {subject}")
-        elif average < 60:
-            weaknesses.append(f"Needs improvement in {subject}")
+    for stats in subject_stats:
+        if stats.average >= 75:
+            strengths.append(f"Strong performance in {stats.subject}")
+        elif stats.average < 60:
+            weaknesses.append(f"Needs improvement in {stats.subject}")
     
     # Analyze recent trend
-    recent_records = sorted(performance_records, key=lambda x: x.created_at, reverse=True)[:5]
-    if len(recent_records) >= 3:
-        recent_average = sum(r.percentage for r in recent_records) / len(recent_records)
-        if recent_average > 80:
-            strengths.append("Showing consistent improvement")
-        elif recent_average < 60:
-            weaknesses.append("Recent performance needs attention")
+    for stats in subject_stats:
+        if stats.assessment_count < 3:
+            continue
+        if stats.recent_average > 80:
+            strengths.append(f"Showing consistent improvement in {stats.subject}")
+        elif stats.recent_average < 60:
+            weaknesses.append(f"Recent {stats.subject} performance needs attention")
     
     return strengths, weaknesses
 
-def generate_recommendations(performance_records: List[PerformanceRecord], average_percentage: float) -> List[str]:
+def generate_recommendations(subject_stats: List[StudentSubjectStats], average_percentage: float) -> List[str]:
     """Generate personalized recommendations"""
     recommendations = []
     
@@ -877,15 +810,8 @@ def generate_recommendations(performance_records: List[PerformanceRecord], avera
         recommendations.append("Consider reviewing fundamental concepts and seeking additional help.")
     
     # Subject-specific recommendations
-    subject_performance = {}
-    for record in performance_records:
-        if record.subject not in subject_performance:
-            subject_performance[record.subject] = []
-        subject_performance[record.subject].append(record.percentage)
-    
-    for subject, percentages in subject_performance.items():
-        subject_average = sum(percentages) / len(percentages)
-        if subject_average < 60:
-            recommendations.append(f"Focus on improving your {subject} skills through practice.")
+    for stats in subject_stats:
+        if stats.average < 60:
+            recommendations.append(f"Focus on improving your {stats.subject} skills through practice.")
     
     return recommendations
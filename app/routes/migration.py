@@ -1,12 +1,119 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from ..core.config import settings
 from ..core.database import get_db, engine
 from ..core.auth import get_current_user
 from ..models.user import User
+from ..services.leaderboard import leaderboards
+from ..services.performance_stats import rebuild_performance_daily, rebuild_student_subject_stats
+from ..services.stats_service import rebuild_quiz_stats
 
 router = APIRouter()
 
+# Idempotent statements for indexes/columns that create_all cannot add to
+# existing tables. New tables are created by Base.metadata.create_all.
+PERFORMANCE_MIGRATIONS = [
+    "CREATE INDEX IF NOT EXISTS ix_questions_quiz_id ON questions (quiz_id)",
+    "CREATE INDEX IF NOT EXISTS ix_quiz_attempts_quiz_id ON quiz_attempts (quiz_id)",
+    "CREATE INDEX IF NOT EXISTS ix_quiz_submissions_question_id ON quiz_submissions (question_id)",
+    "CREATE INDEX IF NOT EXISTS ix_quiz_submissions_attempt_id ON quiz_submissions (attempt_id)",
+    # Keep only the oldest open attempt per student/quiz before enforcing uniqueness
+    """
+    DELETE FROM quiz_attempts
+    WHERE completed_at IS NULL
+      AND id NOT IN (
+          SELECT MIN(id) FROM quiz_attempts
+          WHERE completed_at IS NULL
+          GROUP BY quiz_id, student_id
+      )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_quiz_attempts_open
+    ON quiz_attempts (quiz_id, student_id) WHERE completed_at IS NULL
+    """,
+    "ALTER TABLE quiz_attempts ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ",
+    # Give attempts that were already open on a timed quiz their deadline
+    """
+    UPDATE quiz_attempts
+    SET expires_at = quiz_attempts.started_at + quizzes.time_limit * INTERVAL '1 minute'
+    FROM quizzes
+    WHERE quizzes.id = quiz_attempts.quiz_id
+      AND quizzes.time_limit IS NOT NULL
+      AND quiz_attempts.completed_at IS NULL
+      AND quiz_attempts.expires_at IS NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_quiz_attempts_open_expiry
+    ON quiz_attempts (expires_at) WHERE completed_at IS NULL AND expires_at IS NOT NULL
+    """,
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS topic VARCHAR",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS difficulty VARCHAR",
+    "ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS questions_per_attempt INTEGER",
+    "ALTER TABLE quiz_attempts ADD COLUMN IF NOT EXISTS question_ids JSON",
+    "CREATE INDEX IF NOT EXISTS ix_questions_bank ON questions (quiz_id, topic, difficulty)",
+    "ALTER TABLE performance_records ADD COLUMN IF NOT EXISTS attempt_id INTEGER",
+    # Link existing quiz records to the attempt completed closest to them
+    """
+    UPDATE performance_records
+    SET attempt_id = (
+        SELECT quiz_attempts.id FROM quiz_attempts
+        WHERE quiz_attempts.quiz_id = performance_records.assessment_id
+          AND quiz_attempts.student_id = performance_records.student_id
+          AND quiz_attempts.completed_at IS NOT NULL
+        ORDER BY ABS(EXTRACT(EPOCH FROM quiz_attempts.completed_at - performance_records.created_at))
+        LIMIT 1
+    )
+    WHERE assessment_type = 'quiz' AND attempt_id IS NULL
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_performance_records_attempt_id ON performance_records (attempt_id)",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS accepted_answers JSON",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS numeric_tolerance DOUBLE PRECISION",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS max_edit_distance INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_quiz_attempts_quiz_score ON quiz_attempts (quiz_id, score, id)",
+    "CREATE INDEX IF NOT EXISTS ix_performance_records_student_created ON performance_records (student_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_assignments_creator_due ON assignments (creator_id, due_date)",
+    "CREATE INDEX IF NOT EXISTS ix_assignment_submissions_student_assignment ON assignment_submissions (student_id, assignment_id)",
+    "ALTER TABLE student_subject_stats ADD COLUMN IF NOT EXISTS best_percentage DOUBLE PRECISION",
+    "ALTER TABLE student_subject_stats ADD COLUMN IF NOT EXISTS worst_percentage DOUBLE PRECISION",
+    "ALTER TABLE student_subject_stats ADD COLUMN IF NOT EXISTS recent_average DOUBLE PRECISION",
+    "ALTER TABLE student_subject_stats ADD COLUMN IF NOT EXISTS last_assessment_at TIMESTAMP WITH TIME ZONE",
+    # Fill the new columns from history; the recent average starts at the mean
+    # until the rollups are rebuilt in order below
+    """
+    UPDATE student_subject_stats
+    SET best_percentage = records.best,
+        worst_percentage = records.worst,
+        recent_average = records.mean,
+        last_assessment_at = records.latest
+    FROM (
+        SELECT student_id, subject, MAX(percentage) AS best, MIN(percentage) AS worst,
+               AVG(percentage) AS mean, MAX(created_at) AS latest
+        FROM performance_records
+        GROUP BY student_id, subject
+    ) AS records
+    WHERE student_subject_stats.student_id = records.student_id
+      AND student_subject_stats.subject = records.subject
+      AND student_subject_stats.best_percentage IS NULL
+    """,
+    # Queued submissions go with their quiz
+    """
+    ALTER TABLE submission_queue
+    DROP CONSTRAINT IF EXISTS submission_queue_quiz_id_fkey,
+    ADD CONSTRAINT submission_queue_quiz_id_fkey
+        FOREIGN KEY (quiz_id) REFERENCES quizzes (id) ON DELETE CASCADE
+    """,
+    "ALTER TABLE quiz_attempts ADD COLUMN IF NOT EXISTS counted_unanswered BOOLEAN DEFAULT FALSE",
+    # Attempts closed after their deadline and grace period were auto-submitted
+    f"""
+    UPDATE quiz_attempts
+    SET counted_unanswered = TRUE
+    WHERE counted_unanswered = FALSE
+      AND expires_at IS NOT NULL
+      AND completed_at >= expires_at + INTERVAL '{settings.QUIZ_DEADLINE_GRACE_SECONDS} seconds'
+    """,
+]
+
 @router.post("/migrate-subject-grade")
 def migrate_subject_grade_system(
     current_user: User = Depends(get_current_user),
@@ -195,6 +302,52 @@ def migrate_subject_grade_system(
             detail=f"Migration failed: {str(e)}"
         )
 
+@router.post("/migrate-performance")
+def migrate_performance(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add the indexes and columns used by the grading/analytics fast paths,
+    then rebuild the rollups they read from existing history.
+
+    The rebuilds replace each rollup from scratch, so running this again is
+    safe.
+    """
+    if current_user.role != "teacher":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers can run migrations"
+        )
+    
+    try:
+        for statement in PERFORMANCE_MIGRATIONS:
+            db.execute(text(statement))
+            print(f"✅ {' '.join(statement.split())}")
+        db.commit()
+        
+        rebuilt = {
+            "quiz_stats": rebuild_quiz_stats(db),
+            "student_subject_stats": rebuild_student_subject_stats(db),
+            "performance_daily": rebuild_performance_daily(db)
+        }
+        leaderboards.clear()
+        print(f"✅ Rebuilt rollups: {rebuilt}")
+        
+        return {
+            "message": "Migration completed successfully",
+            "status": "success",
+            "applied": len(PERFORMANCE_MIGRATIONS),
+            "rebuilt": rebuilt
+        }
+        
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error during migration: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Migration failed: {str(e)}"
+        )
+
 @router.post("/create-default-subjects")
 def create_default_subjects(
     current_user: User = Depends(get_current_user),
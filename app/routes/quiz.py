@@ -1,35 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Header, HTTPException, Response, UploadFile, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import JSON, DateTime, and_, or_, func, insert, select, literal
 from typing import List, Optional
-from datetime import datetime, timedelta
-from ..core.database import get_db
+from datetime import datetime, timedelta, timezone
+from ..core.config import settings
+from ..core.database import get_db, upsert_insert
+from ..core.utils import as_naive_utc, decode_cursor, encode_cursor
 from ..core.auth import get_current_teacher, get_current_user, get_current_student
 from ..models.user import User
-from ..models.quiz import Quiz, Question, QuizAttempt, QuizSubmission, QuestionType
-from ..models.performance import PerformanceRecord
+from ..models.quiz import Quiz, Question, QuizAttempt, QuizSubmission, QuizStats, QuestionStats, QueuedSubmission, RegradeJob
 from ..schemas.quiz import (
-    QuizCreate, QuizRead, QuizUpdate, 
-    QuestionCreate, QuestionRead,
-    QuizAttemptCreate, QuizSubmissionCreate,
-    QuizResult, QuizAnalytics
+    QuizCreate, QuizRead, QuizUpdate, QuizListItem,
+    QuestionRead, QuestionUpdate, QuizSubmissionCreate,
+    QuizAnalytics, QuizItemAnalysis, RegradeJobRead
+)
+from ..services.notification_outbox import enqueue_quiz_created, process_outbox_event
+from ..services.visibility_service import get_visible_quiz_ids, invalidate_all_visibility
+from ..services.teacher_overview import invalidate_teacher_overview
+from ..services.submission_queue import submission_queue
+from ..services.deadline_scheduler import deadline_scheduler
+from ..services.autosave_buffer import autosave_buffer, merge_answers
+from ..services.item_analysis import get_item_analysis
+from ..services.question_bank import draw_question_ids
+from ..services.regrade_service import queue_regrade, run_regrade_job
+from ..services.quiz_import import ImportFormatError, detect_format, import_quizzes
+from ..services.quiz_payload_service import get_student_quiz_payload, invalidate_student_quiz_payload
+from ..services.grading_service import (
+    StageTimer, get_answer_key, invalidate_answer_key,
+    grade_submissions, persist_attempt
 )
-from ..services.email_service import send_quiz_notification
 
 router = APIRouter()
 
+def question_count_column():
+    """Correlated COUNT of a quiz's questions, for summary rows"""
+    return select(func.count(Question.id)).where(
+        Question.quiz_id == Quiz.id
+    ).correlate(Quiz).scalar_subquery().label("question_count")
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def quiz_summary_query(db: Session):
+    """Quiz list projection: quiz columns plus question count, no question rows"""
+    return db.query(
+        Quiz.id,
+        Quiz.title,
+        Quiz.description,
+        Quiz.subject,
+        Quiz.time_limit,
+        Quiz.passing_score,
+        Quiz.questions_per_attempt,
+        Quiz.creator_id,
+        Quiz.subject_id,
+        Quiz.grade_id,
+        Quiz.is_active,
+        Quiz.created_at,
+        Quiz.updated_at,
+        question_count_column()
+    )
+
+# Most common answers reported per question in quiz analytics
+ANSWER_DISTRIBUTION_LIMIT = 10
+
 # ==================== PUBLIC ENDPOINTS ====================
 
-@router.get("/public", response_model=List[QuizRead])
+@router.get("/public", response_model=List[QuizListItem])
 def get_public_quizzes(db: Session = Depends(get_db)):
     """Get public quiz list (no authentication required)"""
-    quizzes = db.query(Quiz).filter(Quiz.is_active == True).all()
-    return quizzes
+    quizzes = quiz_summary_query(db).filter(Quiz.is_active == True).all()
+    return [row._mapping for row in quizzes]
 
 @router.get("/public/{quiz_id}")
 def get_public_quiz(quiz_id: int, db: Session = Depends(get_db)):
     """Get public quiz details (no authentication required)"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.is_active == True).first()
+    quiz = quiz_summary_query(db).filter(Quiz.id == quiz_id, Quiz.is_active == True).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
@@ -40,7 +88,7 @@ def get_public_quiz(quiz_id: int, db: Session = Depends(get_db)):
         "subject": quiz.subject,
         "time_limit": quiz.time_limit,
         "passing_score": quiz.passing_score,
-        "question_count": len(quiz.questions) if quiz.questions else 0
+        "question_count": quiz.question_count
     }
 
 # ==================== QUIZ MANAGEMENT (TEACHERS) ====================
@@ -48,53 +96,74 @@ def get_public_quiz(quiz_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=QuizRead)
 def create_quiz(
     quiz_data: QuizCreate,
+    background_tasks: BackgroundTasks,
     current_teacher: User = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Create a new quiz with questions"""
-    # Create quiz
+    # The quiz, its questions and the notification outbox entry are written in
+    # one transaction; the questions go out as a single bulk INSERT
     quiz = Quiz(
         title=quiz_data.title,
         description=quiz_data.description,
         subject=quiz_data.subject,
         time_limit=quiz_data.time_limit,
         passing_score=quiz_data.passing_score,
+        questions_per_attempt=quiz_data.questions_per_attempt,
         creator_id=current_teacher.id
     )
     db.add(quiz)
-    db.commit()
-    db.refresh(quiz)
+    db.flush()
     
-    # Add questions
-    for question_data in quiz_data.questions:
-        question = Question(
-            text=question_data.text,
-            question_type=question_data.question_type,
-            options=question_data.options,
-            correct_answer=question_data.correct_answer,
-            points=question_data.points,
-            explanation=question_data.explanation,
-            quiz_id=quiz.id
-        )
-        db.add(question)
+    if quiz_data.questions:
+        db.execute(insert(Question), [
+            {**question_data.model_dump(), "quiz_id": quiz.id}
+            for question_data in quiz_data.questions
+        ])
     
+    event = enqueue_quiz_created(db, quiz)
+    db.flush()
+    event_id = event.id
     db.commit()
+    invalidate_all_visibility()
+    invalidate_teacher_overview(current_teacher.id)
     
-    # Notify students about new quiz
-    students = db.query(User).filter(User.role == "student", User.is_active == True).all()
-    for student in students:
-        send_quiz_notification(student.email, student.name, quiz.title, quiz.subject)
+    # Notify the teacher's students once the response has been sent
+    background_tasks.add_task(process_outbox_event, event_id)
     
     return quiz
 
-@router.get("/", response_model=List[QuizRead])
+@router.post("/import")
+def import_quizzes_file(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_teacher: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Bulk import quizzes and questions from a CSV, JSON or XLSX file"""
+    file_format = detect_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv, .json or .xlsx file")
+    
+    try:
+        result = import_quizzes(db, file.file, file_format, current_teacher.id, dry_run=dry_run)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if result["quizzes_created"] and not dry_run:
+        invalidate_all_visibility()
+        invalidate_teacher_overview(current_teacher.id)
+    print(f"Quiz import by teacher {current_teacher.id}: {result['questions_created']} questions, {result['error_count']} errors")
+    return result
+
+@router.get("/", response_model=List[QuizListItem])
 def get_quizzes(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     active_only: bool = True
 ):
-    """Get all quizzes (filtered by user role)"""
-    query = db.query(Quiz)
+    """Get all quizzes (filtered by user role) as summary rows"""
+    query = quiz_summary_query(db)
     
     if active_only:
         query = query.filter(Quiz.is_active == True)
@@ -104,42 +173,50 @@ def get_quizzes(
         quizzes = query.filter(Quiz.creator_id == current_user.id).all()
     else:
         # Students see quizzes matched to their enrolled grades, or global quizzes
-        from ..models.subject import StudentGrade, Grade
-        from sqlalchemy import or_, and_
-        
-        # Get student's enrolled grade IDs
-        enrolled_grades = db.query(StudentGrade.grade_id).filter(
-            StudentGrade.student_id == current_user.id,
-            StudentGrade.is_active == True
-        ).all()
-        enrolled_grade_ids = [g[0] for g in enrolled_grades]
-        
-        # Get corresponding subject IDs
-        enrolled_subject_ids = []
-        if enrolled_grade_ids:
-            enrolled_subjects = db.query(Grade.subject_id).filter(
-                Grade.id.in_(enrolled_grade_ids)
-            ).all()
-            enrolled_subject_ids = [s[0] for s in enrolled_subjects]
-            
-        quizzes = query.filter(
-            or_(
-                Quiz.grade_id.in_(enrolled_grade_ids) if enrolled_grade_ids else False,
-                Quiz.subject_id.in_(enrolled_subject_ids) if enrolled_subject_ids else False,
-                and_(Quiz.grade_id == None, Quiz.subject_id == None)
-            )
-        ).all()
+        visible_quiz_ids = get_visible_quiz_ids(db, current_user.id)
+        if not visible_quiz_ids:
+            return []
+        quizzes = query.filter(Quiz.id.in_(visible_quiz_ids)).all()
     
-    return quizzes
+    return [row._mapping for row in quizzes]
 
 @router.get("/{quiz_id}", response_model=QuizRead)
 def get_quiz(
     quiz_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get quiz details"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    """Get quiz details, including its questions.
+    
+    Students get the cached answer-free payload, with ETag/If-None-Match support.
+    For quizzes that draw questions per attempt they only see their own draw.
+    """
+    if current_user.role == "student":
+        payload = get_student_quiz_payload(db, quiz_id)
+        if not payload:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        if not payload.is_active:
+            raise HTTPException(status_code=403, detail="Quiz not available")
+        
+        body, etag = payload.body, payload.etag
+        if payload.per_attempt:
+            # Only the questions drawn for the student's open attempt are shown;
+            # an attempt without a draw gets every question
+            attempt = db.query(QuizAttempt.question_ids).filter(
+                QuizAttempt.quiz_id == quiz_id,
+                QuizAttempt.student_id == current_user.id,
+                QuizAttempt.completed_at == None
+            ).first()
+            if attempt is None or attempt.question_ids is not None:
+                body, etag = payload.for_attempt(attempt.question_ids if attempt else None)
+        
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    
+    quiz = db.query(Quiz).options(selectinload(Quiz.questions)).filter(Quiz.id == quiz_id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
@@ -156,19 +233,30 @@ def get_quiz(
 def update_quiz(
     quiz_id: int,
     quiz_data: QuizUpdate,
+    background_tasks: BackgroundTasks,
     current_teacher: User = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
-    """Update quiz details"""
+    """Update quiz details; changing the pass mark regrades completed attempts"""
     quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.creator_id == current_teacher.id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    for field, value in quiz_data.dict(exclude_unset=True).items():
+    changes = quiz_data.dict(exclude_unset=True)
+    regrade = "passing_score" in changes and changes["passing_score"] != quiz.passing_score
+    for field, value in changes.items():
         setattr(quiz, field, value)
     
     db.commit()
     db.refresh(quiz)
+    invalidate_answer_key(quiz_id)
+    invalidate_student_quiz_payload(quiz_id)
+    invalidate_all_visibility()
+    invalidate_teacher_overview(current_teacher.id)
+    
+    if regrade:
+        job = queue_regrade(db, quiz_id, current_teacher.id)
+        background_tasks.add_task(run_regrade_job, job.id)
     return quiz
 
 @router.delete("/{quiz_id}")
@@ -184,8 +272,54 @@ def delete_quiz(
     
     db.delete(quiz)
     db.commit()
+    invalidate_answer_key(quiz_id)
+    invalidate_student_quiz_payload(quiz_id)
+    invalidate_all_visibility()
+    invalidate_teacher_overview(current_teacher.id)
     return {"message": "Quiz deleted successfully"}
 
+# Question fields that change how existing answers grade
+GRADING_FIELDS = (
+    "question_type", "correct_answer", "accepted_answers",
+    "numeric_tolerance", "max_edit_distance", "points"
+)
+
+@router.put("/{quiz_id}/questions/{question_id}", response_model=QuestionRead)
+def update_question(
+    quiz_id: int,
+    question_id: int,
+    question_data: QuestionUpdate,
+    background_tasks: BackgroundTasks,
+    current_teacher: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Update a question; fixing its answer key regrades completed attempts"""
+    question = db.query(Question).join(Quiz).filter(
+        Question.id == question_id,
+        Question.quiz_id == quiz_id,
+        Quiz.creator_id == current_teacher.id
+    ).first()
+    if not question:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    changes = question_data.dict(exclude_unset=True)
+    regrade = any(
+        field in changes and changes[field] != getattr(question, field)
+        for field in GRADING_FIELDS
+    )
+    for field, value in changes.items():
+        setattr(question, field, value)
+    
+    db.commit()
+    db.refresh(question)
+    invalidate_answer_key(quiz_id)
+    invalidate_student_quiz_payload(quiz_id)
+    
+    if regrade:
+        job = queue_regrade(db, quiz_id, current_teacher.id)
+        background_tasks.add_task(run_regrade_job, job.id)
+    return question
+
 @router.post("/{quiz_id}/toggle")
 def toggle_quiz_status(
     quiz_id: int,
@@ -199,6 +333,10 @@ def toggle_quiz_status(
     
     quiz.is_active = not quiz.is_active
     db.commit()
+    invalidate_answer_key(quiz_id)
+    invalidate_student_quiz_payload(quiz_id)
+    invalidate_all_visibility()
+    invalidate_teacher_overview(current_teacher.id)
     
     status = "activated" if quiz.is_active else "deactivated"
     return {"message": f"Quiz {status} successfully"}
@@ -217,44 +355,69 @@ def start_quiz(
         print(f"Quiz ID: {quiz_id}")
         print(f"Student ID: {current_student.id}")
         
-        # Check if quiz exists and is active
-        quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.is_active == True).first()
-        if not quiz:
+        # The cached answer key carries the time limit, so the deadline can be
+        # written with the attempt
+        answer_key = get_answer_key(db, quiz_id)
+        if answer_key is None:
             print("ERROR: Quiz not found or not active")
             raise HTTPException(status_code=404, detail="Quiz not found or not active")
-        
-        # Check if student already has an active attempt
-        existing_attempt = db.query(QuizAttempt).filter(
-            QuizAttempt.quiz_id == quiz_id,
-            QuizAttempt.student_id == current_student.id,
-            QuizAttempt.completed_at == None
+
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(minutes=answer_key.time_limit) if answer_key.time_limit else None
+        # Quizzes backed by a larger question bank freeze a fresh draw on the attempt
+        question_ids = draw_question_ids(answer_key)
+
+        # Create the attempt, or return the open one, in a single statement. The
+        # partial unique index on open attempts makes concurrent starts converge
+        # on one row instead of racing a check-then-insert
+        stmt = upsert_insert(db, QuizAttempt).from_select(
+            ["quiz_id", "student_id", "started_at", "expires_at", "question_ids"],
+            select(
+                Quiz.id,
+                literal(current_student.id),
+                literal(now, DateTime(timezone=True)),
+                literal(expires_at, DateTime(timezone=True)),
+                literal(question_ids, JSON(none_as_null=True))
+            ).where(
+                Quiz.id == quiz_id,
+                Quiz.is_active == True
+            )
+        )
+        attempt = db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[QuizAttempt.quiz_id, QuizAttempt.student_id],
+                index_where=QuizAttempt.completed_at == None,
+                # No-op update so the existing attempt is still returned
+                set_={"started_at": QuizAttempt.started_at}
+            ).returning(QuizAttempt.id, QuizAttempt.started_at, QuizAttempt.expires_at, QuizAttempt.question_ids)
         ).first()
-        
-        if existing_attempt:
+        db.commit()
+
+        if attempt is None:
+            print("ERROR: Quiz not found or not active")
+            raise HTTPException(status_code=404, detail="Quiz not found or not active")
+
+        attempt_id, started_at, expires_at, question_ids = attempt
+        if as_naive_utc(started_at) != as_naive_utc(now):
             print("INFO: Resuming existing attempt")
-            # Return existing attempt
             return {
-                "attempt_id": existing_attempt.id,
-                "started_at": existing_attempt.started_at,
+                "attempt_id": attempt_id,
+                "started_at": started_at,
+                "expires_at": expires_at,
+                "question_ids": question_ids,
                 "message": "Resuming existing quiz attempt"
             }
-        
-        # Create new attempt
-        print("INFO: Creating new attempt")
-        attempt = QuizAttempt(
-            quiz_id=quiz_id,
-            student_id=current_student.id,
-            started_at=datetime.utcnow()
-        )
-        db.add(attempt)
-        db.commit()
-        db.refresh(attempt)
-        
-        print(f"SUCCESS: Created attempt ID {attempt.id}")
-        
+
+        if expires_at is not None:
+            deadline_scheduler.schedule(attempt_id, expires_at)
+
+        print(f"SUCCESS: Created attempt ID {attempt_id}")
+
         return {
-            "attempt_id": attempt.id,
-            "started_at": attempt.started_at,
+            "attempt_id": attempt_id,
+            "started_at": started_at,
+            "expires_at": expires_at,
+            "question_ids": question_ids,
             "message": "Quiz attempt started successfully"
         }
         
@@ -277,121 +440,110 @@ def start_quiz(
             detail="An error occurred while starting the quiz. Please try again."
         )
 
+def get_autosave_attempt(db: Session, quiz_id: int, attempt_id: int, student: User):
+    """The student's open attempt for the quiz, or 404"""
+    attempt = autosave_buffer.get_open_attempt(db, attempt_id)
+    if attempt is None or attempt.quiz_id != quiz_id or attempt.student_id != student.id:
+        raise HTTPException(status_code=404, detail="No active quiz attempt found")
+    return attempt
+
+@router.put("/{quiz_id}/attempts/{attempt_id}/answers")
+def autosave_answers(
+    quiz_id: int,
+    attempt_id: int,
+    answers: List[QuizSubmissionCreate],
+    current_student: User = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """Autosave answers of an open attempt.
+    
+    Answers are buffered in memory and written in batches, so frequent saves
+    cost no database writes of their own. Only the latest answer per question
+    is kept; submit grades the saved answers together with the submitted ones.
+    """
+    attempt = get_autosave_attempt(db, quiz_id, attempt_id, current_student)
+    if not attempt.accepts_answers():
+        raise HTTPException(status_code=409, detail="Time is up for this quiz attempt")
+    
+    answer_key = get_answer_key(db, quiz_id)
+    if answer_key is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    allowed = attempt.question_ids if attempt.question_ids is not None else answer_key.entries
+    unknown = [answer.question_id for answer in answers if answer.question_id not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Questions not in this quiz attempt: {unknown}")
+    
+    autosave_buffer.save(attempt_id, {answer.question_id: answer.answer for answer in answers})
+    return {"attempt_id": attempt_id, "saved": len(answers)}
+
+@router.get("/{quiz_id}/attempts/{attempt_id}/answers", response_model=List[QuizSubmissionCreate])
+def get_autosaved_answers(
+    quiz_id: int,
+    attempt_id: int,
+    current_student: User = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """Answers autosaved so far for an open attempt"""
+    get_autosave_attempt(db, quiz_id, attempt_id, current_student)
+    return merge_answers(autosave_buffer.answers_for(db, attempt_id), [])
+
 @router.post("/{quiz_id}/submit")
 def submit_quiz(
     quiz_id: int,
     submissions: List[QuizSubmissionCreate],
+    response: Response,
     current_student: User = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    intake: Optional[str] = None
 ):
-    """Submit quiz answers and get results"""
+    """Submit quiz answers and get results.
+    
+    In async intake mode (SUBMISSION_INTAKE_MODE=async or ?intake=async) the
+    answers are queued for grading and a 202 receipt is returned instead.
+    """
+    # Answers autosaved during the attempt count unless submitted again
+    open_attempt_id = db.query(QuizAttempt.id).filter(
+        QuizAttempt.quiz_id == quiz_id,
+        QuizAttempt.student_id == current_student.id,
+        QuizAttempt.completed_at == None
+    ).scalar()
+    if open_attempt_id is not None:
+        submissions = merge_answers(autosave_buffer.answers_for(db, open_attempt_id), submissions)
+    
+    if (intake or settings.SUBMISSION_INTAKE_MODE).lower() == "async":
+        return enqueue_quiz_submission(quiz_id, submissions, current_student, db)
+    
     try:
         print(f"=== QUIZ SUBMISSION START ===")
         print(f"Quiz ID: {quiz_id}")
         print(f"Student ID: {current_student.id}")
         print(f"Number of submissions: {len(submissions)}")
+        timer = StageTimer()
         
-        # Step 1: Validate quiz exists
-        print("Step 1: Validating quiz exists...")
-        quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-        if not quiz:
+        # Step 1: Load the quiz's compiled answer key (cached per quiz version)
+        answer_key = get_answer_key(db, quiz_id)
+        if answer_key is None:
             print("ERROR: Quiz not found")
             raise HTTPException(status_code=404, detail="Quiz not found")
+        timer.mark("answer_key")
         
-        # Step 2: Get active attempt
-        print("Step 2: Getting active attempt...")
-        attempt = db.query(QuizAttempt).filter(
-            QuizAttempt.quiz_id == quiz_id,
-            QuizAttempt.student_id == current_student.id,
-            QuizAttempt.completed_at == None
-        ).first()
+        # Step 2: Grade every answer in one pass
+        graded = grade_submissions(answer_key, submissions)
+        if graded.skipped:
+            print(f"WARNING: Questions not in quiz {quiz_id}: {graded.skipped}")
+        timer.mark("grade")
         
-        if not attempt:
+        # Step 3: Close the open attempt, bulk insert answers and record performance in one commit
+        result = persist_attempt(db, answer_key, current_student.id, graded)
+        if result is None:
             print("ERROR: No active quiz attempt found")
             raise HTTPException(status_code=404, detail="No active quiz attempt found")
+        timer.mark("persist")
         
-        # Step 3: Process submissions
-        print("Step 3: Processing submissions...")
-        total_score = 0
-        total_points = 0
-        
-        for submission_data in submissions:
-            question = db.query(Question).filter(Question.id == submission_data.question_id).first()
-            if not question:
-                print(f"WARNING: Question {submission_data.question_id} not found")
-                continue
-            
-            # Check if answer is correct
-            is_correct = False
-            points_earned = 0
-            
-            if question.question_type == QuestionType.MULTIPLE_CHOICE:
-                is_correct = submission_data.answer.lower().strip() == question.correct_answer.lower().strip()
-            elif question.question_type == QuestionType.TRUE_FALSE:
-                is_correct = submission_data.answer.lower().strip() == question.correct_answer.lower().strip()
-            elif question.question_type == QuestionType.SHORT_ANSWER:
-                # For short answer, check for partial matches
-                student_answer = submission_data.answer.lower().strip()
-                correct_answer = question.correct_answer.lower().strip()
-                is_correct = student_answer == correct_answer
-            
-            if is_correct:
-                points_earned = question.points
-            
-            # Create submission record
-            submission = QuizSubmission(
-                question_id=submission_data.question_id,
-                attempt_id=attempt.id,
-                answer=submission_data.answer,
-                is_correct=is_correct,
-                points_earned=points_earned
-            )
-            db.add(submission)
-            
-            total_score += points_earned
-            total_points += question.points
-        
-        # Step 4: Calculate final results
-        print("Step 4: Calculating final results...")
-        percentage = (total_score / total_points * 100) if total_points > 0 else 0
-        is_passed = percentage >= quiz.passing_score
-        
-        # Step 5: Update attempt
-        print("Step 5: Updating attempt...")
-        attempt.completed_at = datetime.utcnow()
-        attempt.score = total_score
-        attempt.is_passed = is_passed
-        attempt.time_taken = int((attempt.completed_at - attempt.started_at).total_seconds())
-        
-        # Step 6: Create performance record
-        print("Step 6: Creating performance record...")
-        performance_record = PerformanceRecord(
-            student_id=current_student.id,
-            subject=quiz.subject,
-            assessment_type="quiz",
-            assessment_id=quiz.id,
-            score=total_score,
-            max_score=total_points,
-            percentage=percentage,
-            strengths=[],
-            weaknesses=[],
-            recommendations=f"Keep practicing {quiz.subject} concepts." if is_passed else f"Review {quiz.subject} fundamentals."
-        )
-        db.add(performance_record)
+        response.headers["Server-Timing"] = timer.server_timing()
+        print(f"=== QUIZ SUBMISSION SUCCESS === timings(ms): {timer.timings}")
         
-        # Step 7: Commit changes
-        print("Step 7: Committing changes...")
-        db.commit()
-        
-        print("=== QUIZ SUBMISSION SUCCESS ===")
-        
-        return {
-            "score": total_score,
-            "max_score": total_points,
-            "percentage": round(percentage, 2),
-            "is_passed": is_passed,
-            "time_taken": attempt.time_taken
-        }
+        return result
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -412,97 +564,310 @@ def submit_quiz(
             detail="An error occurred while submitting your quiz. Please try again."
         )
 
+def enqueue_quiz_submission(
+    quiz_id: int,
+    submissions: List[QuizSubmissionCreate],
+    current_student: User,
+    db: Session
+):
+    """Check a submission, queue it durably and return a 202 receipt"""
+    answer_key = get_answer_key(db, quiz_id)
+    if answer_key is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    
+    unknown = [s.question_id for s in submissions if s.question_id not in answer_key.entries]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Questions not in this quiz: {unknown}")
+    
+    has_open_attempt = db.query(QuizAttempt.id).filter(
+        QuizAttempt.quiz_id == quiz_id,
+        QuizAttempt.student_id == current_student.id,
+        QuizAttempt.completed_at == None
+    ).first()
+    if not has_open_attempt:
+        raise HTTPException(status_code=404, detail="No active quiz attempt found")
+    
+    job = submission_queue.enqueue(
+        db, quiz_id, current_student.id, [s.model_dump() for s in submissions]
+    )
+    
+    return JSONResponse(status_code=202, content={
+        "receipt": job.receipt,
+        "status": job.status,
+        "status_url": f"/api/quizzes/submissions/{job.receipt}"
+    })
+
+@router.get("/submissions/{receipt}")
+def get_submission_status(
+    receipt: str,
+    current_student: User = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """Get the status of a queued submission, with the result once graded"""
+    job = db.query(QueuedSubmission).filter(
+        QueuedSubmission.receipt == receipt,
+        QueuedSubmission.student_id == current_student.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    
+    return {
+        "receipt": job.receipt,
+        "quiz_id": job.quiz_id,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "completed_at": job.completed_at
+    }
+
+@router.get("/intake/metrics")
+def get_intake_metrics(
+    current_teacher: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Queue depth and drain latency of the async submission intake"""
+    return submission_queue.metrics(db)
+
 # ==================== QUIZ ANALYTICS ====================
 
+def get_answer_distributions(quiz_id: int, db: Session) -> dict:
+    """Most common answers per question, from one grouped query"""
+    rows = db.query(
+        QuizSubmission.question_id,
+        QuizSubmission.answer,
+        func.count(QuizSubmission.id)
+    ).join(
+        Question, Question.id == QuizSubmission.question_id
+    ).filter(
+        Question.quiz_id == quiz_id
+    ).group_by(QuizSubmission.question_id, QuizSubmission.answer).all()
+    
+    distributions = {}
+    for question_id, answer, answer_count in rows:
+        distributions.setdefault(question_id, []).append((answer, answer_count))
+    
+    # Keep the most common answers so free-text questions stay bounded
+    return {
+        question_id: dict(sorted(answers, key=lambda item: item[1], reverse=True)[:ANSWER_DISTRIBUTION_LIMIT])
+        for question_id, answers in distributions.items()
+    }
+
 @router.get("/{quiz_id}/analytics", response_model=QuizAnalytics)
 def get_quiz_analytics(
     quiz_id: int,
     current_teacher: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    include_distribution: bool = False
 ):
-    """Get detailed analytics for a quiz"""
+    """Get detailed analytics for a quiz (read from the quiz_stats rollups)"""
     quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.creator_id == current_teacher.id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    # Get all attempts for this quiz
-    attempts = db.query(QuizAttempt).filter(QuizAttempt.quiz_id == quiz_id).all()
+    stats = db.get(QuizStats, quiz_id)
     
-    if not attempts:
+    if not stats or not stats.attempt_count:
         return {
             "quiz_id": quiz_id,
             "total_attempts": 0,
+            "completed_attempts": 0,
             "average_score": 0,
             "pass_rate": 0,
             "average_time": 0,
             "question_analytics": []
         }
     
-    # Calculate statistics
-    total_attempts = len(attempts)
-    completed_attempts = [a for a in attempts if a.completed_at]
-    passed_attempts = [a for a in completed_attempts if a.is_passed]
+    attempt_count = stats.attempt_count
     
-    average_score = sum(a.score for a in completed_attempts) / len(completed_attempts) if completed_attempts else 0
-    pass_rate = (len(passed_attempts) / len(completed_attempts) * 100) if completed_attempts else 0
-    average_time = sum(a.time_taken for a in completed_attempts) / len(completed_attempts) if completed_attempts else 0
+    # Question-level analytics from the per-question rollups
+    question_rows = db.query(
+        Question.id,
+        Question.text,
+        QuestionStats.answer_count,
+        QuestionStats.correct_count
+    ).outerjoin(
+        QuestionStats, QuestionStats.question_id == Question.id
+    ).filter(
+        Question.quiz_id == quiz_id
+    ).order_by(Question.id).all()
+    
+    distributions = get_answer_distributions(quiz_id, db) if include_distribution else {}
     
-    # Question-level analytics
     question_analytics = []
-    for question in quiz.questions:
-        submissions = db.query(QuizSubmission).join(QuizAttempt).filter(
-            QuizSubmission.question_id == question.id,
-            QuizAttempt.quiz_id == quiz_id
-        ).all()
-        
-        if submissions:
-            correct_count = sum(1 for s in submissions if s.is_correct)
-            success_rate = (correct_count / len(submissions) * 100)
-        else:
-            success_rate = 0
-        
+    for question_id, question_text, answer_count, correct_count in question_rows:
+        answer_count = answer_count or 0
+        correct_count = correct_count or 0
         question_analytics.append({
-            "question_id": question.id,
-            "question_text": question.text,
-            "success_rate": round(success_rate, 2),
-            "total_attempts": len(submissions)
+            "question_id": question_id,
+            "question_text": question_text,
+            "success_rate": round(correct_count / answer_count * 100, 2) if answer_count else 0,
+            "total_attempts": answer_count,
+            "correct_count": correct_count,
+            "answer_distribution": distributions.get(question_id, {})
         })
     
     return {
         "quiz_id": quiz_id,
-        "total_attempts": total_attempts,
-        "average_score": round(average_score, 2),
-        "pass_rate": round(pass_rate, 2),
-        "average_time": round(average_time, 2),
+        "total_attempts": attempt_count,
+        "completed_attempts": attempt_count,
+        "average_score": round(stats.score_sum / attempt_count, 2),
+        "pass_rate": round(stats.pass_count / attempt_count * 100, 2),
+        "average_time": round(stats.time_sum / attempt_count, 2),
         "question_analytics": question_analytics
     }
 
+@router.get("/{quiz_id}/item-analysis", response_model=QuizItemAnalysis)
+def get_quiz_item_analysis(
+    quiz_id: int,
+    current_teacher: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Difficulty, discrimination, distractor and reliability statistics for a quiz"""
+    quiz = db.query(Quiz.id).filter(Quiz.id == quiz_id, Quiz.creator_id == current_teacher.id).first()
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    
+    return get_item_analysis(db, quiz_id)
+
+@router.post("/{quiz_id}/regrade", response_model=RegradeJobRead)
+def regrade_quiz(
+    quiz_id: int,
+    background_tasks: BackgroundTasks,
+    current_teacher: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Regrade every completed attempt against the quiz's current answer key"""
+    quiz = db.query(Quiz.id).filter(Quiz.id == quiz_id, Quiz.creator_id == current_teacher.id).first()
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    
+    job = queue_regrade(db, quiz_id, current_teacher.id)
+    if job.status == "queued":
+        background_tasks.add_task(run_regrade_job, job.id)
+    return job
+
+@router.get("/{quiz_id}/regrade/{job_id}", response_model=RegradeJobRead)
+def get_regrade_job(
+    quiz_id: int,
+    job_id: int,
+    current_teacher: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Progress of a regrade job"""
+    job = db.query(RegradeJob).join(Quiz).filter(
+        RegradeJob.id == job_id,
+        RegradeJob.quiz_id == quiz_id,
+        Quiz.creator_id == current_teacher.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Regrade job not found")
+    
+    return job
+
+# Attempts returned per page by get_quiz_attempts
+ATTEMPTS_PAGE_SIZE = 50
+MAX_ATTEMPTS_PAGE_SIZE = 200
+ATTEMPT_SORTS = ("recent", "score_desc", "score_asc")
+
+def attempts_after(sort: str, cursor: list):
+    """Keyset condition for the rows after ``cursor`` in ``sort`` order.
+    Unscored (open) attempts come last in both score orders."""
+    if sort == "recent":
+        return QuizAttempt.id < cursor[0]
+    score, attempt_id = cursor
+    if score is None:
+        after_id = QuizAttempt.id < attempt_id if sort == "score_desc" else QuizAttempt.id > attempt_id
+        return and_(QuizAttempt.score == None, after_id)
+    if sort == "score_desc":
+        beyond = or_(QuizAttempt.score < score, and_(QuizAttempt.score == score, QuizAttempt.id < attempt_id))
+    else:
+        beyond = or_(QuizAttempt.score > score, and_(QuizAttempt.score == score, QuizAttempt.id > attempt_id))
+    return or_(beyond, QuizAttempt.score == None)
+
 @router.get("/{quiz_id}/attempts")
 def get_quiz_attempts(
     quiz_id: int,
     current_teacher: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = ATTEMPTS_PAGE_SIZE,
+    completed: Optional[bool] = None,
+    passed: Optional[bool] = None,
+    sort: str = "recent"
 ):
-    """Get all attempts for a quiz"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.creator_id == current_teacher.id).first()
+    """Page through a quiz's attempts with their students.
+    
+    Pass ``next_cursor`` from the previous page as ``cursor`` to get the next
+    one. ``sort`` is recent (newest first), score_desc or score_asc.
+    """
+    quiz = db.query(Quiz.id).filter(Quiz.id == quiz_id, Quiz.creator_id == current_teacher.id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
+    if sort not in ATTEMPT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(ATTEMPT_SORTS)}")
+    limit = max(1, min(limit, MAX_ATTEMPTS_PAGE_SIZE))
     
-    attempts = db.query(QuizAttempt).filter(QuizAttempt.quiz_id == quiz_id).all()
-    
-    return [
-        {
-            "id": attempt.id,
-            "student_name": attempt.student.name,
-            "student_email": attempt.student.email,
-            "started_at": attempt.started_at,
-            "completed_at": attempt.completed_at,
-            "score": attempt.score,
-            "is_passed": attempt.is_passed,
-            "time_taken": attempt.time_taken
-        }
-        for attempt in attempts
-    ]
+    query = db.query(
+        QuizAttempt.id,
+        QuizAttempt.student_id,
+        User.name,
+        User.email,
+        QuizAttempt.started_at,
+        QuizAttempt.completed_at,
+        QuizAttempt.score,
+        QuizAttempt.is_passed,
+        QuizAttempt.time_taken
+    ).join(User, User.id == QuizAttempt.student_id).filter(QuizAttempt.quiz_id == quiz_id)
+    
+    if completed is not None:
+        query = query.filter(QuizAttempt.completed_at != None if completed else QuizAttempt.completed_at == None)
+    if passed is not None:
+        query = query.filter(QuizAttempt.is_passed == passed)
+    
+    if cursor:
+        position = decode_cursor(cursor)
+        if (
+            position is None
+            or len(position) != (1 if sort == "recent" else 2)
+            or not isinstance(position[-1], int)
+            or not isinstance(position[0], (int, float, type(None)))
+        ):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(attempts_after(sort, position))
+    
+    if sort == "recent":
+        query = query.order_by(QuizAttempt.id.desc())
+    elif sort == "score_desc":
+        query = query.order_by(QuizAttempt.score.desc().nulls_last(), QuizAttempt.id.desc())
+    else:
+        query = query.order_by(QuizAttempt.score.asc().nulls_last(), QuizAttempt.id.asc())
+    
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.id] if sort == "recent" else [last.score, last.id])
+    
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "student_id": row.student_id,
+                "student_name": row.name,
+                "student_email": row.email,
+                "started_at": row.started_at,
+                "completed_at": row.completed_at,
+                "score": row.score,
+                "is_passed": row.is_passed,
+                "time_taken": row.time_taken
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    }
 
 @router.get("/test/connection")
 def test_database_connection(db: Session = Depends(get_db)):
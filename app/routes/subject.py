@@ -5,6 +5,7 @@ from ..core.database import get_db
 from ..core.auth import get_current_teacher, get_current_user
 from ..models.user import User
 from ..models.subject import Subject, Grade, StudentGrade
+from ..services.visibility_service import invalidate_student_visibility
 from ..schemas.subject import SubjectCreate, SubjectRead, SubjectUpdate, GradeCreate, GradeRead, StudentGradeCreate, StudentGradeRead
 
 router = APIRouter()
@@ -245,6 +246,7 @@ def enroll_student_in_grade(
     db.add(db_enrollment)
     db.commit()
     db.refresh(db_enrollment)
+    invalidate_student_visibility(enrollment.student_id)
     
     return db_enrollment
 
@@ -308,6 +310,7 @@ def unenroll_student_from_grade(
     
     enrollment.is_active = False
     db.commit()
+    invalidate_student_visibility(student_id)
     
     return {"message": "Student unenrolled successfully"}
 
@@ -65,6 +65,7 @@ class SubjectAnalytics(BaseModel):
     total_assessments: int
     best_score: float
     worst_score: float
+    std_deviation: float = 0.0
 
 class DifficultyAnalysis(BaseModel):
     easy: Dict[str, Any]
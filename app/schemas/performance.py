@@ -23,11 +23,18 @@ class PerformanceRecordRead(BaseModel):
 class StudentPerformance(BaseModel):
     student_id: int
     student_name: str
+    student_email: Optional[str] = None
+    total_assessments: int = 0
     total_quizzes: int
     total_assignments: int
     average_quiz_score: float
     average_assignment_score: float
     overall_percentage: float
+    best_score: float = 0.0
+    worst_score: float = 0.0
+    recent_trend: float = 0.0  # average of the latest 5 assessments
+    subject_breakdown: Dict[str, float] = {}
+    last_assessment: Optional[datetime] = None
     rank: Optional[int] = None
 
 class LeaderboardEntry(BaseModel):
@@ -43,6 +50,9 @@ class DiagnosticReport(BaseModel):
     student_name: str
     subject: str
     overall_percentage: float
+    total_assessments: int = 0
+    average_percentage: float = 0.0
+    best_score: float = 0.0
     strengths: List[str]
     weaknesses: List[str]
     recommendations: List[str]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -11,17 +11,40 @@ class QuestionType(str, Enum):
 
 # ==================== QUIZ SCHEMAS ====================
 
+class QuestionDifficulty(str, Enum):
+    EASY = "easy"
+    MEDIUM = "medium"
+    HARD = "hard"
+
 class QuestionBase(BaseModel):
     text: str
     question_type: QuestionType
     options: Optional[List[str]] = None
     correct_answer: str
+    accepted_answers: Optional[List[str]] = None  # key points for essays
+    numeric_tolerance: Optional[float] = Field(None, ge=0)
+    max_edit_distance: Optional[int] = Field(None, ge=0, le=3)
     points: float = 1.0
     explanation: Optional[str] = None
+    topic: Optional[str] = None
+    difficulty: Optional[QuestionDifficulty] = None
 
 class QuestionCreate(QuestionBase):
     pass
 
+class QuestionUpdate(BaseModel):
+    text: Optional[str] = None
+    question_type: Optional[QuestionType] = None
+    options: Optional[List[str]] = None
+    correct_answer: Optional[str] = None
+    accepted_answers: Optional[List[str]] = None
+    numeric_tolerance: Optional[float] = Field(None, ge=0)
+    max_edit_distance: Optional[int] = Field(None, ge=0, le=3)
+    points: Optional[float] = None
+    explanation: Optional[str] = None
+    topic: Optional[str] = None
+    difficulty: Optional[QuestionDifficulty] = None
+
 class QuestionRead(QuestionBase):
     id: int
     quiz_id: int
@@ -35,6 +58,7 @@ class QuizBase(BaseModel):
     subject: str
     time_limit: Optional[int] = None
     passing_score: float = 60.0
+    questions_per_attempt: Optional[int] = Field(None, ge=1)
 
 class QuizCreate(QuizBase):
     questions: List[QuestionCreate]
@@ -45,6 +69,7 @@ class QuizUpdate(BaseModel):
     subject: Optional[str] = None
     time_limit: Optional[int] = None
     passing_score: Optional[float] = None
+    questions_per_attempt: Optional[int] = Field(None, ge=1)
     is_active: Optional[bool] = None
 
 class QuizRead(QuizBase):
@@ -58,6 +83,40 @@ class QuizRead(QuizBase):
     class Config:
         from_attributes = True
 
+class QuestionStudentRead(BaseModel):
+    """Question as shown to a student taking the quiz (no answer or explanation)"""
+    id: int
+    quiz_id: int
+    text: str
+    question_type: QuestionType
+    options: Optional[List[str]] = None
+    points: float = 1.0
+
+    class Config:
+        from_attributes = True
+
+class QuizStudentRead(QuizBase):
+    id: int
+    is_active: bool
+    questions: List[QuestionStudentRead] = []
+
+    class Config:
+        from_attributes = True
+
+class QuizListItem(QuizBase):
+    """Summary row used by quiz lists; questions are only sent by the detail endpoint"""
+    id: int
+    creator_id: int
+    subject_id: Optional[int] = None
+    grade_id: Optional[int] = None
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    question_count: int = 0
+
+    class Config:
+        from_attributes = True
+
 # ==================== QUIZ ATTEMPT SCHEMAS ====================
 
 class QuizAttemptBase(BaseModel):
@@ -124,15 +183,50 @@ class QuestionAnalytics(BaseModel):
     question_text: str
     success_rate: float
     total_attempts: int
+    correct_count: int = 0
+    answer_distribution: Dict[str, int] = {}
 
 class QuizAnalytics(BaseModel):
     quiz_id: int
     total_attempts: int
+    completed_attempts: int = 0
     average_score: float
     pass_rate: float
     average_time: float
     question_analytics: List[QuestionAnalytics] = []
 
+class ItemStatistics(BaseModel):
+    question_id: int
+    question_text: str
+    question_type: QuestionType
+    answered: int
+    p_value: Optional[float] = None  # share of attempts that got it right
+    discrimination: Optional[float] = None  # corrected point-biserial
+    distractors: Dict[str, int] = {}
+
+class QuizItemAnalysis(BaseModel):
+    quiz_id: int
+    attempts: int
+    mean_score: Optional[float] = None
+    score_std: Optional[float] = None
+    kr20: Optional[float] = None
+    items: List[ItemStatistics] = []
+
+class RegradeJobRead(BaseModel):
+    id: int
+    quiz_id: int
+    status: str
+    total_attempts: int = 0
+    processed_attempts: int = 0
+    changed_attempts: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # ==================== QUIZ DASHBOARD SCHEMAS ====================
 
 class QuizSummary(BaseModel):
@@ -0,0 +1,155 @@
+import re
+import unicodedata
+from typing import FrozenSet, Iterable, Optional, Tuple
+from ..models.quiz import QuestionType
+
+# Everything that is neither a letter, a digit nor whitespace
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+# Numbers as students type them: "-3", "2.50", "1,000", ".5", "1e-3", "45%"
+_NUMBER = re.compile(r"^[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)?(?:\.\d+)?(?:e[+-]?\d+)?%?$")
+# Relative slack on numeric comparisons, for floating point noise
+NUMERIC_EPSILON = 1e-9
+# One typo is tolerated per this many characters of the accepted answer
+TYPO_EVERY_CHARS = 4
+
+def normalise_answer(answer: Optional[str]) -> str:
+    """Normalise an answer for comparison"""
+    return (answer or "").lower().strip()
+
+def canonical_text(answer: Optional[str]) -> str:
+    """Case, punctuation and spacing insensitive form of a free-text answer:
+    "  The Nile-river. " -> "the nile river" """
+    text = unicodedata.normalize("NFKC", answer or "").casefold()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+def parse_number(answer: Optional[str]) -> Optional[float]:
+    """Read a numeric answer, or None if the answer is not a number"""
+    text = "".join((answer or "").split()).lower()
+    if not text or not _NUMBER.match(text) or not any(ch.isdigit() for ch in text):
+        return None
+    scale = 0.01 if text.endswith("%") else 1.0
+    try:
+        return float(text.rstrip("%").replace(",", "")) * scale
+    except ValueError:
+        return None
+
+def within_edit_distance(a: str, b: str, limit: int) -> bool:
+    """Whether Levenshtein distance(a, b) <= limit.
+
+    Only the diagonal band of width 2 * limit + 1 is computed and the scan
+    stops as soon as a whole row exceeds the limit, so the cost is
+    O(limit * len) rather than O(len(a) * len(b)).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if a == b:
+        return True
+    if limit == 0:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+
+    too_far = limit + 1
+    previous = [j if j <= limit else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= limit else too_far
+        row_best = current[0]
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost <= limit else too_far
+            if current[j] < row_best:
+                row_best = current[j]
+        if row_best > limit:
+            return False
+        previous = current
+    return previous[len(b)] <= limit
+
+class AnswerMatcher:
+    """Accepted forms of one question's answer, compiled once per answer key.
+
+    ``score`` returns the share of the question's points an answer earns:
+
+    * multiple choice / true-false: the option text, case-insensitive
+    * short answer: any accepted answer, ignoring case, punctuation and
+      spacing; numerically equal within ``numeric_tolerance`` when both are
+      numbers; within ``max_edit_distance`` typos when set (fewer for
+      short answers)
+    * essay: partial credit for the share of key points (the accepted
+      answers) the essay mentions. Essays without key points are not
+      auto-graded and score None
+    """
+
+    __slots__ = ("question_type", "forms", "numbers", "tolerance", "max_distance", "key_points")
+
+    def __init__(
+        self,
+        question_type: QuestionType,
+        correct_answer: Optional[str],
+        accepted_answers: Optional[Iterable[str]] = None,
+        numeric_tolerance: Optional[float] = None,
+        max_edit_distance: Optional[int] = None
+    ):
+        self.question_type = question_type
+        self.tolerance = numeric_tolerance or 0.0
+        self.max_distance = max_edit_distance or 0
+        self.key_points: Tuple[str, ...] = ()
+        self.numbers: Tuple[float, ...] = ()
+        answers = [answer for answer in (accepted_answers or []) if answer and str(answer).strip()]
+
+        if question_type == QuestionType.ESSAY:
+            self.forms: FrozenSet[str] = frozenset()
+            points = (canonical_text(str(point)) for point in answers)
+            self.key_points = tuple(dict.fromkeys(point for point in points if point))
+        elif question_type == QuestionType.SHORT_ANSWER:
+            candidates = [correct_answer, *answers]
+            self.forms = frozenset(canonical_text(str(answer)) for answer in candidates if answer is not None) - {""}
+            self.numbers = tuple(
+                number for number in (parse_number(str(answer)) for answer in candidates if answer is not None)
+                if number is not None
+            )
+        else:
+            self.forms = frozenset(normalise_answer(str(answer)) for answer in [correct_answer, *answers] if answer is not None)
+
+    @property
+    def auto_graded(self) -> bool:
+        """False for essays without key points, which score None"""
+        return self.question_type != QuestionType.ESSAY or bool(self.key_points)
+
+    def score(self, answer: Optional[str]) -> Optional[float]:
+        if self.question_type == QuestionType.ESSAY:
+            if not self.key_points:
+                return None
+            text = f" {canonical_text(answer)} "
+            found = sum(1 for point in self.key_points if f" {point} " in text)
+            return found / len(self.key_points)
+
+        if self.question_type != QuestionType.SHORT_ANSWER:
+            return 1.0 if normalise_answer(answer) in self.forms else 0.0
+
+        # Numbers are compared as numbers before any text match: canonical
+        # text drops signs and percent signs, so "-5" and "5%" would read as "5"
+        if self.numbers:
+            number = parse_number(answer)
+            if number is not None:
+                for expected in self.numbers:
+                    if abs(number - expected) <= self.tolerance + NUMERIC_EPSILON * max(abs(expected), 1.0):
+                        return 1.0
+                # A wrong number is wrong, however close it is as text
+                return 0.0
+        text = canonical_text(answer)
+        if text in self.forms:
+            return 1.0
+        if self.max_distance and text:
+            for form in self.forms:
+                # Short answers get fewer typos: "nil" must not accept "nl"
+                limit = min(self.max_distance, len(form) // TYPO_EVERY_CHARS)
+                if limit and within_edit_distance(text, form, limit):
+                    return 1.0
+        return 0.0
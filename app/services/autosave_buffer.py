@@ -0,0 +1,206 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+from ..core.cache import LRUCache
+from ..core.config import settings
+from ..core.database import SessionLocal, upsert_insert
+from ..core.utils import as_naive_utc
+from ..models.quiz import AttemptAnswer, QuizAttempt
+from ..schemas.quiz import QuizSubmissionCreate
+
+class OpenAttempt(NamedTuple):
+    quiz_id: int
+    student_id: int
+    question_ids: Optional[Tuple[int, ...]]
+    expires_at: Optional[datetime]
+
+    def accepts_answers(self) -> bool:
+        """Answers are taken until the deadline scheduler would close the attempt"""
+        if self.expires_at is None:
+            return True
+        closes_at = as_naive_utc(self.expires_at) + timedelta(seconds=settings.QUIZ_DEADLINE_GRACE_SECONDS)
+        return as_naive_utc(datetime.now(timezone.utc)) < closes_at
+
+class AutosaveBuffer:
+    """Write-behind buffer for answers autosaved while a quiz is being taken.
+
+    Saves only update an in-memory map of attempt -> question -> latest answer,
+    so repeated saves of the same question collapse into one row. A background
+    thread writes the map to attempt_answers as one batched upsert every
+    AUTOSAVE_FLUSH_SECONDS, or sooner once AUTOSAVE_FLUSH_BATCH answers are
+    waiting. Reads merge the stored answers with the ones still in memory.
+
+    Answers saved in the last flush interval are lost if the process dies;
+    the final submit carries the client's answers as well.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, Dict[int, str]] = {}
+        self._flushing: Dict[int, Dict[int, str]] = {}
+        self._pending_count = 0
+        # Attempts submitted while their answers were being written
+        self._discarded = set()
+        self._attempts = LRUCache(max_entries=settings.AUTOSAVE_ATTEMPT_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.saved = 0
+        self.written = 0
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autosave-flusher", daemon=True)
+        self._thread.start()
+        print(f"✅ Autosave buffer started (flush every {settings.AUTOSAVE_FLUSH_SECONDS}s)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(settings.AUTOSAVE_FLUSH_SECONDS)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Autosave flush error: {e}")
+
+    # ---------- attempts ----------
+
+    def get_open_attempt(self, db: Session, attempt_id: int) -> Optional[OpenAttempt]:
+        """Owner and draw of an open attempt, cached until it is submitted"""
+        attempt = self._attempts.get(attempt_id)
+        if attempt is None:
+            row = db.query(
+                QuizAttempt.quiz_id, QuizAttempt.student_id, QuizAttempt.question_ids, QuizAttempt.expires_at
+            ).filter(QuizAttempt.id == attempt_id, QuizAttempt.completed_at == None).first()
+            if row is None:
+                return None
+            attempt = OpenAttempt(row[0], row[1], tuple(row[2]) if row[2] is not None else None, row[3])
+            self._attempts.set(attempt_id, attempt)
+        return attempt
+
+    # ---------- buffering ----------
+
+    def save(self, attempt_id: int, answers: Dict[int, str]):
+        with self._lock:
+            buffered = self._pending.setdefault(attempt_id, {})
+            before = len(buffered)
+            buffered.update(answers)
+            self._pending_count += len(buffered) - before
+            self.saved += len(answers)
+            full = self._pending_count >= settings.AUTOSAVE_FLUSH_BATCH
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending_count
+
+    def answers_for(self, db: Session, attempt_id: int) -> Dict[int, str]:
+        """Latest saved answer per question, stored or still buffered"""
+        # Take the buffered answers before reading the table, so answers a
+        # concurrent flush moves from one to the other are seen either way
+        with self._lock:
+            buffered = {**self._flushing.get(attempt_id, {}), **self._pending.get(attempt_id, {})}
+        answers = dict(db.query(AttemptAnswer.question_id, AttemptAnswer.answer).filter(
+            AttemptAnswer.attempt_id == attempt_id
+        ).all())
+        answers.update(buffered)
+        return answers
+
+    def discard(self, attempt_id: int):
+        """Forget an attempt being submitted; call before deleting its stored
+        answers, so a flush that is writing them either sees the discard or
+        has committed before that delete runs"""
+        with self._lock:
+            self._pending_count -= len(self._pending.pop(attempt_id, {}))
+            if attempt_id in self._flushing:
+                self._discarded.add(attempt_id)
+        self._attempts.pop(attempt_id)
+
+    # ---------- write-behind ----------
+
+    def _write(self, db: Session, rows: List[dict]):
+        stmt = upsert_insert(db, AttemptAnswer)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[AttemptAnswer.attempt_id, AttemptAnswer.question_id],
+            set_={"answer": stmt.excluded.answer, "updated_at": func.now()}
+        ), rows)
+
+    def flush(self) -> int:
+        """Write every buffered answer in one batched upsert; returns the row count"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._pending_count = self._pending, {}, 0
+                self._flushing = batch
+            if not batch:
+                return 0
+
+            db = SessionLocal()
+            written = 0
+            try:
+                try:
+                    rows = list(_rows(batch.items()))
+                    self._write(db, rows)
+                    db.commit()
+                    written = len(rows)
+                except Exception as e:
+                    # One attempt deleted with its quiz must not lose everyone
+                    # else's answers: retry attempt by attempt
+                    db.rollback()
+                    print(f"Autosave batch failed, retrying per attempt: {e}")
+                    for attempt_id, answers in batch.items():
+                        try:
+                            rows = list(_rows([(attempt_id, answers)]))
+                            self._write(db, rows)
+                            db.commit()
+                            written += len(rows)
+                        except Exception as e:
+                            db.rollback()
+                            print(f"Dropped autosaved answers for attempt {attempt_id}: {e}")
+
+                # Same critical section as leaving _flushing: an attempt
+                # discarded before this is deleted below, one discarded after
+                # it is submitted after the batch committed, and its own
+                # delete removes the rows
+                with self._lock:
+                    submitted = self._discarded & batch.keys()
+                    self._discarded -= submitted
+                    self._flushing = {}
+                if submitted:
+                    db.execute(delete(AttemptAnswer).where(AttemptAnswer.attempt_id.in_(submitted)))
+                    db.commit()
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                db.close()
+
+            self.written += written
+            return written
+
+def _rows(batch: Iterable[Tuple[int, Dict[int, str]]]):
+    for attempt_id, answers in batch:
+        for question_id, answer in answers.items():
+            yield {"attempt_id": attempt_id, "question_id": question_id, "answer": answer}
+
+def merge_answers(saved: Dict[int, str], submissions: Iterable[QuizSubmissionCreate]) -> List[QuizSubmissionCreate]:
+    """Autosaved answers with the submitted ones taking precedence"""
+    answers = dict(saved)
+    answers.update((submission.question_id, submission.answer) for submission in submissions)
+    return [QuizSubmissionCreate(question_id=question_id, answer=answer) for question_id, answer in answers.items()]
+
+autosave_buffer = AutosaveBuffer()
@@ -0,0 +1,141 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.utils import as_naive_utc
+from ..models.quiz import QuizAttempt
+from .autosave_buffer import autosave_buffer, merge_answers
+from .grading_service import get_answer_key, grade_submissions, persist_attempt
+
+# Resolution of the wheel and the number of slots in one revolution
+TICK_SECONDS = 1
+WHEEL_SLOTS = 512
+
+class DeadlineScheduler:
+    """Hashed timer wheel that closes timed quiz attempts when they run out.
+
+    Each open timed attempt sits in the slot for its deadline tick, with the
+    number of whole revolutions left before it is due. A single thread
+    advances one slot per tick, so the cost per tick is the size of one slot
+    rather than the number of open attempts. The wheel is rebuilt on start
+    from the partial index on open timed attempts.
+
+    Attempts submitted before their deadline are not removed from the wheel;
+    closing them later is a no-op because they are no longer open.
+    """
+
+    def __init__(self):
+        self._slots: List[Dict[int, int]] = [dict() for _ in range(WHEEL_SLOTS)]
+        self._tick = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.expired = 0
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        scheduled = self._rebuild()
+        self._thread = threading.Thread(target=self._run, name="deadline-scheduler", daemon=True)
+        self._thread.start()
+        print(f"✅ Deadline scheduler started with {scheduled} open timed attempts")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _rebuild(self) -> int:
+        db = SessionLocal()
+        try:
+            rows = db.query(QuizAttempt.id, QuizAttempt.expires_at).filter(
+                QuizAttempt.completed_at == None,
+                QuizAttempt.expires_at != None
+            ).all()
+        except Exception as e:
+            print(f"Deadline scheduler recovery skipped: {e}")
+            return 0
+        finally:
+            db.close()
+
+        for attempt_id, expires_at in rows:
+            self.schedule(attempt_id, expires_at)
+        return len(rows)
+
+    # ---------- scheduling ----------
+
+    def schedule(self, attempt_id: int, expires_at: datetime):
+        """Close the attempt once ``expires_at`` plus the grace period has passed"""
+        due_at = as_naive_utc(expires_at) + timedelta(seconds=settings.QUIZ_DEADLINE_GRACE_SECONDS)
+        remaining = (due_at - as_naive_utc(datetime.now(timezone.utc))).total_seconds()
+        ticks = max(int(-(-remaining // TICK_SECONDS)), 1)
+
+        with self._lock:
+            target = self._tick + ticks
+            self._slots[target % WHEEL_SLOTS][attempt_id] = (ticks - 1) // WHEEL_SLOTS
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(slot) for slot in self._slots)
+
+    def _advance(self) -> List[int]:
+        """Move to the next tick and return the attempts that are now due"""
+        with self._lock:
+            self._tick += 1
+            slot = self._slots[self._tick % WHEEL_SLOTS]
+            due = [attempt_id for attempt_id, rounds in slot.items() if rounds == 0]
+            for attempt_id in due:
+                del slot[attempt_id]
+            for attempt_id in slot:
+                slot[attempt_id] -= 1
+        return due
+
+    def _run(self):
+        next_tick = time.monotonic() + TICK_SECONDS
+        while not self._stop.wait(max(next_tick - time.monotonic(), 0)):
+            next_tick += TICK_SECONDS
+            due = self._advance()
+            if due:
+                try:
+                    self.expire(due)
+                except Exception as e:
+                    print(f"Deadline scheduler error: {e}")
+
+    # ---------- expiry ----------
+
+    def expire(self, attempt_ids: List[int]):
+        """Auto-submit attempts whose time ran out, grading their autosaved answers"""
+        db = SessionLocal()
+        try:
+            attempts = db.query(QuizAttempt.id, QuizAttempt.quiz_id, QuizAttempt.student_id).filter(
+                QuizAttempt.id.in_(attempt_ids),
+                QuizAttempt.completed_at == None
+            ).all()
+            db.rollback()
+
+            for attempt_id, quiz_id, student_id in attempts:
+                try:
+                    answer_key = get_answer_key(db, quiz_id)
+                    if answer_key is None:
+                        continue
+                    # Grade whatever the student autosaved before time ran out
+                    saved = merge_answers(autosave_buffer.answers_for(db, attempt_id), [])
+                    graded = grade_submissions(answer_key, saved)
+                    # Unanswered questions count against the student
+                    graded.count_unanswered = True
+                    if persist_attempt(db, answer_key, student_id, graded, attempt_id=attempt_id):
+                        self.expired += 1
+                        print(f"⏰ Auto-submitted expired quiz attempt {attempt_id}")
+                except Exception as e:
+                    db.rollback()
+                    print(f"Could not auto-submit quiz attempt {attempt_id}: {e}")
+        finally:
+            db.close()
+
+deadline_scheduler = DeadlineScheduler()
@@ -0,0 +1,306 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from ..core.cache import VersionedCache
+from ..core.config import settings
+from ..core.utils import as_naive_utc
+from ..models.quiz import Quiz, Question, QuizAttempt, QuizSubmission, AttemptAnswer, QuestionType
+from ..models.performance import PerformanceRecord
+from .answer_matcher import AnswerMatcher
+from .stats_service import record_quiz_result
+from .performance_stats import record_performance
+from .autosave_buffer import autosave_buffer
+
+class StageTimer:
+    """Records how long each stage of a grading request takes (in ms)"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str):
+        """Close the current stage and start timing the next one"""
+        now = time.perf_counter()
+        self.timings[stage] = round((now - self._last) * 1000, 3)
+        self._last = now
+
+    def server_timing(self) -> str:
+        """Format the timings as a Server-Timing header value"""
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.timings.items())
+
+class AnswerKey:
+    """Compiled answer key for one quiz.
+
+    Holds what grading needs so a submission never has to read the quiz back:
+    question id -> (type, compiled answer matcher, points), the total points and the
+    quiz fields used for the attempt result, the attempt deadline and the
+    performance rollups. For quizzes that draw questions per attempt it also
+    holds the question bank strata: (topic, difficulty) -> question ids.
+    """
+
+    def __init__(
+        self,
+        quiz_id: int,
+        subject: str,
+        passing_score: float,
+        entries: Dict[int, Tuple[QuestionType, AnswerMatcher, float]],
+        time_limit: Optional[int] = None,
+        questions_per_attempt: Optional[int] = None,
+        strata: Optional[Dict[Tuple[Optional[str], Optional[str]], Tuple[int, ...]]] = None,
+        creator_id: Optional[int] = None
+    ):
+        self.quiz_id = quiz_id
+        self.creator_id = creator_id
+        self.subject = subject
+        self.passing_score = passing_score
+        self.time_limit = time_limit
+        self.questions_per_attempt = questions_per_attempt
+        self.strata = strata or {}
+        self.entries = entries
+        self.total_points = sum(points for _, matcher, points in entries.values() if matcher.auto_graded)
+
+    def points_for(self, question_ids: Optional[List[int]] = None) -> float:
+        """Total points of the given questions, or of the whole quiz. Essays
+        left for the teacher to mark are not part of the automatic score"""
+        if question_ids is None:
+            return self.total_points
+        return sum(
+            self.entries[question_id][2] for question_id in question_ids
+            if question_id in self.entries and self.entries[question_id][1].auto_graded
+        )
+
+class GradedAttempt:
+    """Result of grading one submission in memory, ready to be persisted"""
+
+    def __init__(self):
+        self.rows: List[dict] = []
+        self.score = 0.0
+        self.max_score = 0.0
+        self.skipped: List[int] = []
+        # When set, questions left unanswered still count towards max_score
+        self.count_unanswered = False
+
+    def restrict_to(self, key: "AnswerKey", question_ids: Optional[List[int]]):
+        """Keep only answers to the questions drawn for the attempt and settle
+        max_score for it"""
+        if question_ids is not None:
+            allowed = set(question_ids)
+            kept = [row for row in self.rows if row["question_id"] in allowed]
+            self.skipped += [row["question_id"] for row in self.rows if row["question_id"] not in allowed]
+            self.rows = kept
+            self.score = sum(row["points_earned"] for row in kept)
+            self.max_score = key.points_for([row["question_id"] for row in kept])
+        if self.count_unanswered:
+            self.max_score = key.points_for(question_ids)
+
+# Answer keys per (quiz id, version), bounded by LRU eviction
+answer_key_cache = VersionedCache(max_entries=settings.ANSWER_KEY_CACHE_SIZE)
+
+def load_answer_key(db: Session, quiz_id: int) -> Optional[AnswerKey]:
+    """Load the quiz and its whole answer key in a single query"""
+    rows = db.query(
+        Quiz.subject,
+        Quiz.passing_score,
+        Quiz.time_limit,
+        Quiz.questions_per_attempt,
+        Quiz.creator_id,
+        Question.id,
+        Question.question_type,
+        Question.correct_answer,
+        Question.accepted_answers,
+        Question.numeric_tolerance,
+        Question.max_edit_distance,
+        Question.points,
+        Question.topic,
+        Question.difficulty
+    ).outerjoin(Question, Question.quiz_id == Quiz.id).filter(Quiz.id == quiz_id).order_by(Question.id).all()
+
+    if not rows:
+        return None
+
+    entries = {}
+    strata: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+    for row in rows:
+        if row.id is None:
+            continue
+        entries[row.id] = (
+            row.question_type,
+            AnswerMatcher(
+                row.question_type,
+                row.correct_answer,
+                row.accepted_answers,
+                row.numeric_tolerance,
+                row.max_edit_distance
+            ),
+            row.points if row.points is not None else 0.0
+        )
+        strata.setdefault((row.topic, row.difficulty), []).append(row.id)
+
+    subject, passing_score, time_limit, questions_per_attempt, creator_id = rows[0][:5]
+    return AnswerKey(
+        quiz_id,
+        subject,
+        passing_score if passing_score is not None else 60.0,
+        entries,
+        time_limit,
+        questions_per_attempt,
+        {stratum: tuple(question_ids) for stratum, question_ids in strata.items()},
+        creator_id
+    )
+
+def get_answer_key(db: Session, quiz_id: int) -> Optional[AnswerKey]:
+    """Return the cached answer key for a quiz, loading it on a miss"""
+    key = answer_key_cache.get(quiz_id)
+    if key is None:
+        version = answer_key_cache.version(quiz_id)
+        key = load_answer_key(db, quiz_id)
+        if key is not None:
+            answer_key_cache.set(quiz_id, key, version)
+    return key
+
+def invalidate_answer_key(quiz_id: int):
+    """Drop a quiz's cached answer key after the quiz or its questions change"""
+    answer_key_cache.invalidate(quiz_id)
+
+def grade_answer(key: AnswerKey, question_id: int, answer: Optional[str]) -> Optional[Tuple[Optional[bool], float]]:
+    """Grade one answer against the key: (is_correct, points earned), or None
+    when the question does not belong to the quiz. is_correct is None for
+    essays left for the teacher to mark"""
+    entry = key.entries.get(question_id)
+    if entry is None:
+        return None
+
+    _, matcher, points = entry
+    share = matcher.score(answer)
+    if share is None:
+        return None, 0.0
+    return share >= 1.0, points * share
+
+def grade_submissions(key: AnswerKey, submissions) -> GradedAttempt:
+    """Grade every submitted answer against the key in one pass"""
+    graded = GradedAttempt()
+
+    for submission in submissions:
+        result = grade_answer(key, submission.question_id, submission.answer)
+        if result is None:
+            # Question does not belong to this quiz
+            graded.skipped.append(submission.question_id)
+            continue
+
+        is_correct, points_earned = result
+        graded.rows.append({
+            "question_id": submission.question_id,
+            "answer": submission.answer,
+            "is_correct": is_correct,
+            "points_earned": points_earned
+        })
+        graded.score += points_earned
+        if is_correct is not None:
+            graded.max_score += key.entries[submission.question_id][2]
+
+    return graded
+
+def quiz_recommendation(subject: str, is_passed: bool) -> str:
+    """Recommendation stored on a quiz performance record"""
+    return f"Keep practicing {subject} concepts." if is_passed else f"Review {subject} fundamentals."
+
+def _seconds_between(start: Optional[datetime], end: datetime) -> int:
+    """Whole seconds between two timestamps, treating naive values as UTC"""
+    if start is None:
+        return 0
+    return max(int((as_naive_utc(end) - as_naive_utc(start)).total_seconds()), 0)
+
+def persist_attempt(
+    db: Session,
+    key: AnswerKey,
+    student_id: int,
+    graded: GradedAttempt,
+    commit: bool = True,
+    attempt_id: Optional[int] = None
+) -> Optional[dict]:
+    """Close the student's open attempt, bulk insert the graded answers, update
+    the quiz rollups and record performance in a single commit.
+
+    Returns None when the student has no open attempt for the quiz (or when
+    ``attempt_id`` is given and that attempt is no longer open). With
+    ``commit=False`` the caller commits, so it can add its own writes.
+    """
+    completed_at = datetime.utcnow()
+
+    # Closing the attempt with UPDATE ... RETURNING finds it and guards against
+    # a second concurrent submit in the same statement
+    open_attempt = update(QuizAttempt).where(
+        QuizAttempt.quiz_id == key.quiz_id,
+        QuizAttempt.student_id == student_id,
+        QuizAttempt.completed_at == None
+    )
+    if attempt_id is not None:
+        open_attempt = open_attempt.where(QuizAttempt.id == attempt_id)
+    closed = db.execute(
+        open_attempt
+        .values(completed_at=completed_at)
+        .returning(QuizAttempt.id, QuizAttempt.started_at, QuizAttempt.question_ids)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if closed is None:
+        db.rollback()
+        return None
+
+    attempt_id, started_at, question_ids = closed
+    # Only the questions drawn for this attempt count
+    graded.restrict_to(key, question_ids)
+    percentage = (graded.score / graded.max_score * 100) if graded.max_score > 0 else 0
+    is_passed = percentage >= key.passing_score
+    time_taken = _seconds_between(started_at, completed_at)
+    db.execute(
+        update(QuizAttempt)
+        .where(QuizAttempt.id == attempt_id)
+        .values(
+            score=graded.score,
+            is_passed=is_passed,
+            time_taken=time_taken,
+            counted_unanswered=graded.count_unanswered
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    if graded.rows:
+        for row in graded.rows:
+            row["attempt_id"] = attempt_id
+        db.execute(insert(QuizSubmission), graded.rows)
+
+    # Autosaved drafts are superseded by the graded answers
+    autosave_buffer.discard(attempt_id)
+    db.execute(delete(AttemptAnswer).where(AttemptAnswer.attempt_id == attempt_id))
+
+    record_quiz_result(db, key.quiz_id, graded.score, is_passed, time_taken, graded.rows)
+
+    record_performance(db, key.creator_id, PerformanceRecord(
+        student_id=student_id,
+        attempt_id=attempt_id,
+        subject=key.subject,
+        assessment_type="quiz",
+        assessment_id=key.quiz_id,
+        score=graded.score,
+        max_score=graded.max_score,
+        percentage=percentage,
+        time_taken=time_taken,
+        strengths=[],
+        weaknesses=[],
+        recommendations=quiz_recommendation(key.subject, is_passed)
+    ))
+
+    if commit:
+        db.commit()
+
+    return {
+        "attempt_id": attempt_id,
+        "score": graded.score,
+        "max_score": graded.max_score,
+        "percentage": round(percentage, 2),
+        "is_passed": is_passed,
+        "time_taken": time_taken
+    }
@@ -0,0 +1,190 @@
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.performance import StudentSubjectStats
+from ..models.user import User
+
+# Boards are keyed by (tutor id, subject); subject None is the all-subjects board
+BoardKey = Tuple[Optional[int], Optional[str]]
+
+_PENDING_KEY = "leaderboard_deltas"
+
+class LeaderboardDelta(NamedTuple):
+    tutor_id: Optional[int]
+    student_id: int
+    student_name: str
+    subject: str
+    count: int
+    score: float
+    percentage: float
+
+class Standing:
+    __slots__ = ("student_id", "student_name", "count", "score_sum", "percentage_sum")
+
+    def __init__(self, student_id: int, student_name: str, count: int = 0, score_sum: float = 0.0, percentage_sum: float = 0.0):
+        self.student_id = student_id
+        self.student_name = student_name
+        self.count = count
+        self.score_sum = score_sum
+        self.percentage_sum = percentage_sum
+
+    @property
+    def average(self) -> float:
+        return self.percentage_sum / self.count if self.count else 0.0
+
+    def sort_key(self) -> Tuple[float, int]:
+        return (-self.average, self.student_id)
+
+class Board:
+    """One cohort's students with results, ordered by average percentage.
+
+    ``order`` is a sorted list of (-average, student id), so a student's
+    position is a bisect and the top N is a slice.
+    """
+
+    def __init__(self):
+        self.order: List[Tuple[float, int]] = []
+        self.standings: Dict[int, Standing] = {}
+
+    def add(self, delta: LeaderboardDelta):
+        standing = self.standings.get(delta.student_id)
+        if standing is None:
+            standing = self.standings[delta.student_id] = Standing(delta.student_id, delta.student_name)
+        else:
+            del self.order[bisect_left(self.order, standing.sort_key())]
+        standing.student_name = delta.student_name
+        standing.count += delta.count
+        standing.score_sum += delta.score
+        standing.percentage_sum += delta.percentage
+        insort(self.order, standing.sort_key())
+
+    def top(self, limit: int) -> List[Standing]:
+        return [self.standings[student_id] for _, student_id in self.order[:max(limit, 0)]]
+
+    def position(self, student_id: int) -> Optional[int]:
+        """1-based rank of the student, or None without results"""
+        standing = self.standings.get(student_id)
+        if standing is None:
+            return None
+        return bisect_left(self.order, standing.sort_key()) + 1
+
+class Leaderboards:
+    """In-memory leaderboards per tutor cohort and subject.
+
+    A board is loaded from student_subject_stats on first read and then kept
+    current by the deltas of committed performance records, so reads never
+    scan performance_records. Membership changes (a student moving tutor or
+    being deactivated) drop the tutor's boards; they reload on the next read.
+    """
+
+    def __init__(self, max_boards: int):
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[BoardKey, Board]" = OrderedDict()
+        # Bumped on every change to a tutor's boards, so a load that raced
+        # with one is not cached
+        self._generation: Dict[Optional[int], int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session, tutor_id: Optional[int], subject: Optional[str]) -> Board:
+        query = db.query(
+            User.id,
+            User.name,
+            func.sum(StudentSubjectStats.assessment_count),
+            func.sum(StudentSubjectStats.score_sum),
+            func.sum(StudentSubjectStats.percentage_sum)
+        ).join(StudentSubjectStats, StudentSubjectStats.student_id == User.id).filter(
+            User.tutor_id == tutor_id,
+            User.role == "student",
+            User.is_active == True
+        )
+        if subject:
+            query = query.filter(StudentSubjectStats.subject == subject)
+
+        board = Board()
+        for student_id, name, count, score_sum, percentage_sum in query.group_by(User.id, User.name):
+            if count:
+                board.add(LeaderboardDelta(tutor_id, student_id, name, subject, count, score_sum, percentage_sum))
+        return board
+
+    def _board(self, db: Session, tutor_id: Optional[int], subject: Optional[str]) -> Board:
+        """The board for a cohort, loading it if needed; call without the lock"""
+        key = (tutor_id, subject or None)
+        with self._lock:
+            board = self._boards.get(key)
+            if board is not None:
+                self._boards.move_to_end(key)
+                return board
+            generation = (self._epoch, self._generation.get(tutor_id, 0))
+
+        board = self._load(db, tutor_id, subject)
+        with self._lock:
+            if (self._epoch, self._generation.get(tutor_id, 0)) == generation and key not in self._boards:
+                self._boards[key] = board
+                while len(self._boards) > self.max_boards:
+                    self._boards.popitem(last=False)
+        return board
+
+    def top(self, db: Session, tutor_id: Optional[int], subject: Optional[str], limit: int) -> List[Standing]:
+        board = self._board(db, tutor_id, subject)
+        with self._lock:
+            return [
+                Standing(s.student_id, s.student_name, s.count, s.score_sum, s.percentage_sum)
+                for s in board.top(limit)
+            ]
+
+    def standing(self, db: Session, tutor_id: Optional[int], subject: Optional[str], student_id: int) -> Optional[Tuple[int, Standing]]:
+        """(rank, standing) of one student in the cohort, or None without results"""
+        board = self._board(db, tutor_id, subject)
+        with self._lock:
+            rank = board.position(student_id)
+            if rank is None:
+                return None
+            s = board.standings[student_id]
+            return rank, Standing(s.student_id, s.student_name, s.count, s.score_sum, s.percentage_sum)
+
+    def apply(self, deltas: List[LeaderboardDelta]):
+        with self._lock:
+            for delta in deltas:
+                self._generation[delta.tutor_id] = self._generation.get(delta.tutor_id, 0) + 1
+                for key in ((delta.tutor_id, delta.subject), (delta.tutor_id, None)):
+                    board = self._boards.get(key)
+                    if board is not None:
+                        board.add(delta)
+
+    def invalidate(self, *tutor_ids: Optional[int]):
+        """Drop the boards of cohorts whose membership changed"""
+        with self._lock:
+            for tutor_id in set(tutor_ids):
+                self._generation[tutor_id] = self._generation.get(tutor_id, 0) + 1
+                for key in [key for key in self._boards if key[0] == tutor_id]:
+                    del self._boards[key]
+
+    def clear(self):
+        """Drop every board, e.g. after results were rewritten by a regrade"""
+        with self._lock:
+            self._epoch += 1
+            self._boards.clear()
+
+leaderboards = Leaderboards(max_boards=settings.LEADERBOARD_CACHE_SIZE)
+
+def queue_leaderboard_delta(db: Session, delta: LeaderboardDelta):
+    """Apply a leaderboard change once the session's transaction commits"""
+    db.info.setdefault(_PENDING_KEY, []).append(delta)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_committed_deltas(session: Session):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        leaderboards.apply(deltas)
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _drop_uncommitted_deltas(session: Session, transaction):
+    # Rolled back or closed without a commit
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
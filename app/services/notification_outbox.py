@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from typing import Callable, Dict, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from ..core.database import SessionLocal
+from ..models.announcement import NotificationOutbox
+from ..models.quiz import Quiz
+from ..models.user import User
+from .email_service import send_quiz_notification
+
+def enqueue_quiz_created(db: Session, quiz: Quiz) -> NotificationOutbox:
+    """Record that the teacher's students should hear about a new quiz.
+
+    Added to the caller's transaction; nothing is sent until the event is
+    processed after the commit.
+    """
+    event = NotificationOutbox(
+        event_type="quiz_created",
+        payload={
+            "quiz_id": quiz.id,
+            "title": quiz.title,
+            "subject": quiz.subject,
+            "tutor_id": quiz.creator_id
+        },
+        status="pending"
+    )
+    db.add(event)
+    return event
+
+def _send_quiz_created(db: Session, payload: dict) -> Tuple[int, int]:
+    """Email the creating teacher's active students; returns (sent, failed)"""
+    students = db.query(User.email, User.name).filter(
+        User.tutor_id == payload["tutor_id"],
+        User.role == "student",
+        User.is_active == True
+    ).all()
+
+    sent = 0
+    for email, name in students:
+        if send_quiz_notification(email, name, payload["title"], payload["subject"]):
+            sent += 1
+    return sent, len(students) - sent
+
+EVENT_HANDLERS: Dict[str, Callable[[Session, dict], Tuple[int, int]]] = {
+    "quiz_created": _send_quiz_created,
+}
+
+def process_outbox_event(event_id: int):
+    """Deliver one outbox event. Safe to call more than once: only the caller
+    that moves the event out of "pending" delivers it."""
+    db = SessionLocal()
+    try:
+        claimed = db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == event_id, NotificationOutbox.status == "pending")
+            .values(status="processing")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+
+        event = db.get(NotificationOutbox, event_id)
+        try:
+            sent, failed = EVENT_HANDLERS[event.event_type](db, event.payload)
+            event.status = "sent"
+            event.error = f"{failed} of {sent + failed} notifications failed" if failed else None
+        except Exception as e:
+            db.rollback()
+            event.status = "failed"
+            event.error = str(e)
+            print(f"Outbox event {event_id} failed: {e}")
+
+        event.processed_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+
+def process_pending_outbox() -> int:
+    """Deliver events left pending, e.g. by a restart before their background
+    task ran, or interrupted mid-delivery"""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.status == "processing")
+            .values(status="pending")
+        )
+        db.commit()
+        event_ids = [
+            event_id for (event_id,) in db.query(NotificationOutbox.id)
+            .filter(NotificationOutbox.status == "pending")
+            .order_by(NotificationOutbox.id)
+        ]
+    finally:
+        db.close()
+
+    for event_id in event_ids:
+        process_outbox_event(event_id)
+    return len(event_ids)
@@ -0,0 +1,262 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import Date, and_, case, cast, func, delete, insert, or_, select, text, union_all
+from sqlalchemy.orm import Session
+from ..core.database import upsert_insert
+from ..models.assignment import Assignment
+from ..models.performance import PerformanceRecord, StudentSubjectStats, PerformanceDaily
+from ..models.quiz import Quiz
+from ..models.user import User
+from .leaderboard import LeaderboardDelta, queue_leaderboard_delta
+
+# Weight of the newest result in a subject's recent (exponentially weighted) average
+RECENT_WEIGHT = 0.3
+# Student/subject rows written per INSERT when rebuilding
+REBUILD_BATCH_SIZE = 1000
+
+# Percentage bands of the teacher analytics difficulty breakdown
+EASY_FROM = 80
+MEDIUM_FROM = 60
+
+def _band(percentage: float) -> str:
+    if percentage >= EASY_FROM:
+        return "easy"
+    if percentage >= MEDIUM_FROM:
+        return "medium"
+    return "hard"
+
+def record_performance(db: Session, tutor_id: Optional[int], record: PerformanceRecord):
+    """Add a performance record and fold it into the performance rollups.
+
+    ``tutor_id`` is the teacher who set the assessment. Runs inside the
+    caller's transaction so the rollups commit together with the record; the
+    student's leaderboards follow once that commit lands.
+    """
+    db.add(record)
+
+    stmt = upsert_insert(db, StudentSubjectStats).values(
+        student_id=record.student_id,
+        subject=record.subject,
+        assessment_count=1,
+        score_sum=record.score,
+        percentage_sum=record.percentage,
+        best_percentage=record.percentage,
+        worst_percentage=record.percentage,
+        recent_average=record.percentage,
+        last_assessment_at=func.now()
+    )
+    excluded = stmt.excluded
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[StudentSubjectStats.student_id, StudentSubjectStats.subject],
+        set_={
+            "assessment_count": StudentSubjectStats.assessment_count + excluded.assessment_count,
+            "score_sum": StudentSubjectStats.score_sum + excluded.score_sum,
+            "percentage_sum": StudentSubjectStats.percentage_sum + excluded.percentage_sum,
+            "best_percentage": case(
+                (or_(StudentSubjectStats.best_percentage == None, excluded.best_percentage > StudentSubjectStats.best_percentage), excluded.best_percentage),
+                else_=StudentSubjectStats.best_percentage
+            ),
+            "worst_percentage": case(
+                (or_(StudentSubjectStats.worst_percentage == None, excluded.worst_percentage < StudentSubjectStats.worst_percentage), excluded.worst_percentage),
+                else_=StudentSubjectStats.worst_percentage
+            ),
+            "recent_average": case(
+                (StudentSubjectStats.recent_average == None, excluded.recent_average),
+                else_=StudentSubjectStats.recent_average * (1 - RECENT_WEIGHT) + excluded.recent_average * RECENT_WEIGHT
+            ),
+            "last_assessment_at": func.now(),
+            "updated_at": func.now()
+        }
+    ))
+
+    if tutor_id is not None:
+        _record_daily(db, tutor_id, record.subject, record.percentage)
+
+    student = db.query(User.tutor_id, User.name, User.is_active).filter(User.id == record.student_id).first()
+    if student is not None and student.is_active:
+        queue_leaderboard_delta(db, LeaderboardDelta(
+            tutor_id=student.tutor_id,
+            student_id=record.student_id,
+            student_name=student.name,
+            subject=record.subject,
+            count=1,
+            score=record.score,
+            percentage=record.percentage
+        ))
+
+def _record_daily(db: Session, tutor_id: int, subject: str, percentage: float):
+    band = _band(percentage)
+    stmt = upsert_insert(db, PerformanceDaily).values(
+        tutor_id=tutor_id,
+        day=datetime.utcnow().date(),
+        subject=subject,
+        assessment_count=1,
+        percentage_sum=percentage,
+        percentage_sq_sum=percentage * percentage,
+        best_percentage=percentage,
+        worst_percentage=percentage,
+        easy_count=1 if band == "easy" else 0,
+        easy_sum=percentage if band == "easy" else 0.0,
+        medium_count=1 if band == "medium" else 0,
+        medium_sum=percentage if band == "medium" else 0.0,
+        hard_count=1 if band == "hard" else 0,
+        hard_sum=percentage if band == "hard" else 0.0
+    )
+    excluded = stmt.excluded
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[PerformanceDaily.tutor_id, PerformanceDaily.day, PerformanceDaily.subject],
+        set_={
+            **{
+                column: getattr(PerformanceDaily, column) + getattr(excluded, column)
+                for column in (
+                    "assessment_count", "percentage_sum", "percentage_sq_sum",
+                    "easy_count", "easy_sum", "medium_count", "medium_sum", "hard_count", "hard_sum"
+                )
+            },
+            "best_percentage": case(
+                (excluded.best_percentage > PerformanceDaily.best_percentage, excluded.best_percentage),
+                else_=PerformanceDaily.best_percentage
+            ),
+            "worst_percentage": case(
+                (excluded.worst_percentage < PerformanceDaily.worst_percentage, excluded.worst_percentage),
+                else_=PerformanceDaily.worst_percentage
+            )
+        }
+    ))
+
+def rebuild_student_subject_stats(db: Session, student_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute student_subject_stats from performance_records.
+
+    Rebuilds every student, or only ``student_ids`` when given, and commits;
+    returns the number of rows written. The records are replayed in the order
+    they were created, since the recent average depends on it. Leaderboards
+    are not touched, callers drop the ones they affected.
+    """
+    delete_stats = delete(StudentSubjectStats)
+    records = db.query(
+        PerformanceRecord.student_id,
+        PerformanceRecord.subject,
+        PerformanceRecord.score,
+        PerformanceRecord.percentage,
+        PerformanceRecord.created_at
+    )
+
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+        delete_stats = delete_stats.where(StudentSubjectStats.student_id.in_(student_ids))
+        records = records.filter(PerformanceRecord.student_id.in_(student_ids))
+
+    if db.bind.dialect.name == "postgresql":
+        # Same guarantee as the quiz rollups: writes that already folded in
+        # finish first, later ones wait for the rebuild
+        db.execute(text("LOCK TABLE student_subject_stats IN EXCLUSIVE MODE"))
+
+    stats: Dict[Tuple[int, str], dict] = {}
+    for student_id, subject, score, percentage, created_at in records.order_by(
+        PerformanceRecord.created_at, PerformanceRecord.id
+    ).yield_per(REBUILD_BATCH_SIZE):
+        row = stats.get((student_id, subject))
+        if row is None:
+            stats[(student_id, subject)] = {
+                "student_id": student_id,
+                "subject": subject,
+                "assessment_count": 1,
+                "score_sum": score,
+                "percentage_sum": percentage,
+                "best_percentage": percentage,
+                "worst_percentage": percentage,
+                "recent_average": percentage,
+                "last_assessment_at": created_at
+            }
+            continue
+        row["assessment_count"] += 1
+        row["score_sum"] += score
+        row["percentage_sum"] += percentage
+        row["best_percentage"] = max(row["best_percentage"], percentage)
+        row["worst_percentage"] = min(row["worst_percentage"], percentage)
+        row["recent_average"] = row["recent_average"] * (1 - RECENT_WEIGHT) + percentage * RECENT_WEIGHT
+        row["last_assessment_at"] = created_at
+
+    db.execute(delete_stats)
+    rows = list(stats.values())
+    for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+        db.execute(insert(StudentSubjectStats), rows[start:start + REBUILD_BATCH_SIZE])
+    db.commit()
+
+    return len(rows)
+
+def _utc_day(db: Session, column):
+    """SQL expression for the UTC calendar day of a timestamp column"""
+    if db.bind.dialect.name == "sqlite":
+        return func.date(column)
+    return cast(func.timezone("UTC", column), Date)
+
+def rebuild_performance_daily(db: Session, tutor_id: Optional[int] = None) -> int:
+    """Recompute performance_daily from performance_records.
+
+    Rebuilds every teacher, or only ``tutor_id`` when given, and commits;
+    returns the number of rows written. Records are attributed to the
+    teacher who created the quiz or assignment.
+    """
+    delete_daily = delete(PerformanceDaily)
+    day = _utc_day(db, PerformanceRecord.created_at)
+    branches = []
+    for model, assessment_type in ((Quiz, "quiz"), (Assignment, "assignment")):
+        branch = select(
+            model.creator_id.label("tutor_id"),
+            day.label("day"),
+            PerformanceRecord.subject.label("subject"),
+            PerformanceRecord.percentage.label("percentage")
+        ).join(model, and_(
+            PerformanceRecord.assessment_type == assessment_type,
+            PerformanceRecord.assessment_id == model.id
+        ))
+        if tutor_id is not None:
+            branch = branch.where(model.creator_id == tutor_id)
+        branches.append(branch)
+    if tutor_id is not None:
+        delete_daily = delete_daily.where(PerformanceDaily.tutor_id == tutor_id)
+
+    records = union_all(*branches).subquery()
+    percentage = records.c.percentage
+
+    bands = (
+        percentage >= EASY_FROM,
+        and_(percentage >= MEDIUM_FROM, percentage < EASY_FROM),
+        percentage < MEDIUM_FROM
+    )
+    band_totals = [
+        total
+        for condition in bands
+        for total in (func.sum(case((condition, 1), else_=0)), func.sum(case((condition, percentage), else_=0.0)))
+    ]
+
+    daily = select(
+        records.c.tutor_id,
+        records.c.day,
+        records.c.subject,
+        func.count(),
+        func.sum(percentage),
+        func.sum(percentage * percentage),
+        func.max(percentage),
+        func.min(percentage),
+        *band_totals
+    ).group_by(records.c.tutor_id, records.c.day, records.c.subject)
+
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE performance_daily IN EXCLUSIVE MODE"))
+
+    db.execute(delete_daily)
+    rows = db.execute(insert(PerformanceDaily).from_select(
+        [
+            "tutor_id", "day", "subject", "assessment_count", "percentage_sum", "percentage_sq_sum",
+            "best_percentage", "worst_percentage",
+            "easy_count", "easy_sum", "medium_count", "medium_sum", "hard_count", "hard_sum"
+        ],
+        daily
+    )).rowcount
+    db.commit()
+
+    return rows
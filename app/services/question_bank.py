@@ -0,0 +1,61 @@
+import random
+from typing import Dict, List, Optional, Tuple
+from .grading_service import AnswerKey
+
+Stratum = Tuple[Optional[str], Optional[str]]
+
+def allocate_draw(sizes: Dict[Stratum, int], count: int) -> Dict[Stratum, int]:
+    """Split ``count`` across strata in proportion to their size.
+
+    Every stratum gets the whole part of its share; each of the seats left
+    over goes to a stratum with probability equal to its fractional part.
+    The quotas add up to ``count`` exactly, match each stratum's share on
+    average and never ask a stratum for more questions than it has.
+    """
+    total = sum(sizes.values())
+    count = min(count, total)
+    if not count:
+        return {}
+
+    exact = {stratum: size * count / total for stratum, size in sizes.items()}
+    quotas = {stratum: int(share) for stratum, share in exact.items()}
+    remainders = {stratum: exact[stratum] - quotas[stratum] for stratum in sizes}
+    # Systematic sampling over the shuffled remainders: each stratum gets an
+    # extra seat with probability equal to its fractional share
+    order = list(remainders)
+    random.shuffle(order)
+    seats = count - sum(quotas.values())
+    position = random.random()
+    cumulative = 0.0
+    for stratum in order:
+        if not seats:
+            break
+        cumulative += remainders[stratum]
+        if cumulative > position:
+            quotas[stratum] += 1
+            seats -= 1
+            position += 1
+    # Floating point can leave the last seat unassigned
+    unseated = [stratum for stratum in order if quotas[stratum] == int(exact[stratum]) and remainders[stratum] > 0]
+    for stratum in sorted(unseated, key=lambda stratum: remainders[stratum], reverse=True)[:seats]:
+        quotas[stratum] += 1
+    return quotas
+
+def draw_question_ids(key: AnswerKey) -> Optional[List[int]]:
+    """Draw a stratified random sample of a quiz's questions for one attempt.
+
+    Samples from the per-(topic, difficulty) id tuples precomputed on the
+    cached answer key, so no query runs. Returns None when the quiz gives
+    every attempt all of its questions.
+    """
+    count = key.questions_per_attempt
+    if not count or count >= len(key.entries):
+        return None
+
+    quotas = allocate_draw({stratum: len(ids) for stratum, ids in key.strata.items()}, count)
+    question_ids: List[int] = []
+    for stratum, quota in quotas.items():
+        if quota:
+            question_ids.extend(random.sample(key.strata[stratum], quota))
+    random.shuffle(question_ids)
+    return question_ids
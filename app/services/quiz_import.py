@@ -0,0 +1,284 @@
+import codecs
+import csv
+import io
+import json
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from openpyxl import load_workbook
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from ..models.quiz import Quiz, Question
+from ..schemas.quiz import QuizBase, QuestionCreate
+
+# Questions buffered before a bulk insert
+IMPORT_CHUNK_SIZE = 1000
+# Errors listed in the response; the total is always reported
+MAX_REPORTED_ERRORS = 200
+# Bytes decoded per read while streaming a JSON upload
+JSON_READ_SIZE = 64 * 1024
+
+QUIZ_FIELDS = ("title", "description", "subject", "time_limit", "passing_score", "questions_per_attempt")
+QUESTION_FIELDS = (
+    "text", "question_type", "options", "correct_answer", "accepted_answers",
+    "numeric_tolerance", "max_edit_distance", "points", "explanation", "topic", "difficulty"
+)
+
+class ImportFormatError(ValueError):
+    """The upload could not be read as the declared format"""
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Pick csv/json/xlsx from the file name, falling back to the content type"""
+    name = (filename or "").lower()
+    for extension in ("csv", "json", "xlsx"):
+        if name.endswith(f".{extension}"):
+            return extension
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "json" in content_type:
+        return "json"
+    if "spreadsheetml" in content_type:
+        return "xlsx"
+    return None
+
+# ---------- readers: yield (row number, quiz fields, question fields) ----------
+
+def _split_options(value) -> Optional[List[str]]:
+    """Options or accepted answers cell: a JSON list or values separated by "|" """
+    if value is None or isinstance(value, list):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    if value.startswith("["):
+        return json.loads(value)
+    return [option.strip() for option in value.split("|")]
+
+def _blank_to_none(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == "" else value
+
+def _split_flat_row(row: Dict) -> Tuple[Dict, Dict]:
+    # Headers are matched loosely: "Quiz Title", "quiz-title" and "quiz_title" are the same column
+    row = {
+        "_".join(str(key).strip().lower().replace("-", " ").split()): _blank_to_none(value)
+        for key, value in row.items() if key is not None
+    }
+    # Quiz columns may carry a quiz_ prefix (quiz_title, quiz_subject, ...)
+    quiz = {field: row.get(f"quiz_{field}", row.get(field)) for field in QUIZ_FIELDS}
+    question = {field: row.get(field) for field in QUESTION_FIELDS}
+    return quiz, question
+
+def iter_csv(stream: BinaryIO) -> Iterator[Tuple[int, Dict, Dict]]:
+    """One question per CSV row; quiz columns repeat on each of its rows"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for row in reader:
+        yield (reader.line_num, *_split_flat_row(row))
+
+def iter_xlsx(stream: BinaryIO) -> Iterator[Tuple[int, Dict, Dict]]:
+    """Same columns as the CSV layout, read from the first worksheet"""
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Could not read the spreadsheet: {e}")
+
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else None for cell in next(rows, [])]
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield (row_number, *_split_flat_row(dict(zip(header, values))))
+    finally:
+        workbook.close()
+
+def _iter_json_array(stream: BinaryIO) -> Iterator[dict]:
+    """Decode the items of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    started = False
+    finished = False
+
+    while True:
+        chunk = stream.read(JSON_READ_SIZE)
+        buffer += reader.decode(chunk or b"", final=not chunk)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ImportFormatError("JSON imports must be an array of quizzes")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                finished = True
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise ImportFormatError("The JSON file is not valid")
+                # Item continues in the next chunk
+                break
+            yield item
+        buffer = buffer[position:]
+        if finished:
+            return
+        if not chunk:
+            raise ImportFormatError("The JSON file is not valid")
+
+def iter_json(stream: BinaryIO) -> Iterator[Tuple[int, Dict, Dict]]:
+    """An array of quizzes shaped like the create-quiz body; each question is a row"""
+    row_number = 0
+    for quiz_number, item in enumerate(_iter_json_array(stream), start=1):
+        if not isinstance(item, dict):
+            row_number += 1
+            yield row_number, {"title": None, "_error": f"quiz {quiz_number} is not an object"}, {}
+            continue
+        quiz = {field: item.get(field) for field in QUIZ_FIELDS}
+        # Questions of one JSON quiz always belong to that quiz, even if another
+        # quiz in the file has the same title
+        quiz["_key"] = quiz_number
+        for question in item.get("questions") or []:
+            row_number += 1
+            yield row_number, quiz, question if isinstance(question, dict) else {"text": question}
+
+READERS = {"csv": iter_csv, "json": iter_json, "xlsx": iter_xlsx}
+
+# ---------- import ----------
+
+def _format_errors(error: ValidationError, prefix: str = "") -> List[str]:
+    return [
+        f"{prefix}{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+class QuizImporter:
+    """Validates streamed rows and bulk inserts them in chunks.
+
+    Quizzes are created on the first chunk that contains one of their
+    questions; everything is committed once at the end, so a failed import
+    leaves nothing behind.
+    """
+
+    def __init__(self, db: Session, creator_id: int, dry_run: bool = False):
+        self.db = db
+        self.creator_id = creator_id
+        self.dry_run = dry_run
+        self.quiz_ids: Dict[object, int] = {}
+        self.pending_quizzes: Dict[object, dict] = {}
+        self.pending_questions: List[Tuple[object, dict]] = []
+        self.rows = 0
+        self.quizzes_created = 0
+        self.questions_created = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, row_number: int, messages: List[str]):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    def add_row(self, row_number: int, quiz_fields: dict, question_fields: dict):
+        self.rows += 1
+        if quiz_fields.get("_error"):
+            self.add_error(row_number, [quiz_fields["_error"]])
+            return
+
+        messages = []
+        try:
+            question_fields = {**question_fields, "options": _split_options(question_fields.get("options"))}
+        except ValueError as e:
+            messages.append(f"options: {e}")
+            question_fields = {**question_fields, "options": None}
+        try:
+            question_fields["accepted_answers"] = _split_options(question_fields.get("accepted_answers"))
+        except ValueError as e:
+            messages.append(f"accepted_answers: {e}")
+            question_fields["accepted_answers"] = None
+        try:
+            quiz = QuizBase(**{field: quiz_fields.get(field) for field in QUIZ_FIELDS if quiz_fields.get(field) is not None})
+        except ValidationError as e:
+            quiz = None
+            messages += _format_errors(e, "quiz.")
+        try:
+            question = QuestionCreate(**{key: value for key, value in question_fields.items() if value is not None})
+        except ValidationError as e:
+            question = None
+            messages += _format_errors(e)
+
+        if messages:
+            self.add_error(row_number, messages)
+            return
+
+        key = quiz_fields.get("_key") or (quiz.title, quiz.subject)
+        if key not in self.quiz_ids and key not in self.pending_quizzes:
+            self.pending_quizzes[key] = {**quiz.model_dump(), "creator_id": self.creator_id}
+        self.pending_questions.append((key, question.model_dump()))
+
+        if len(self.pending_questions) >= IMPORT_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Insert the buffered quizzes, then their questions, in bulk"""
+        if self.pending_quizzes:
+            keys = list(self.pending_quizzes)
+            if self.dry_run:
+                ids = [0] * len(keys)
+            else:
+                ids = self.db.execute(
+                    insert(Quiz).returning(Quiz.id, sort_by_parameter_order=True),
+                    [self.pending_quizzes[key] for key in keys]
+                ).scalars().all()
+            self.quiz_ids.update(zip(keys, ids))
+            self.quizzes_created += len(keys)
+            self.pending_quizzes = {}
+
+        if self.pending_questions:
+            if not self.dry_run:
+                self.db.execute(
+                    insert(Question),
+                    [{**question, "quiz_id": self.quiz_ids[key]} for key, question in self.pending_questions]
+                )
+            self.questions_created += len(self.pending_questions)
+            self.pending_questions = []
+
+    def result(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows_processed": self.rows,
+            "quizzes_created": self.quizzes_created,
+            "questions_created": self.questions_created,
+            "error_count": self.error_count,
+            "errors": self.errors
+        }
+
+def import_quizzes(db: Session, stream: BinaryIO, file_format: str, creator_id: int, dry_run: bool = False) -> dict:
+    """Stream an uploaded file into quizzes and questions owned by ``creator_id``.
+
+    Invalid rows are skipped and reported; valid rows are imported. Raises
+    ImportFormatError when the file itself cannot be read.
+    """
+    importer = QuizImporter(db, creator_id, dry_run)
+    try:
+        for row_number, quiz_fields, question_fields in READERS[file_format](stream):
+            try:
+                importer.add_row(row_number, quiz_fields, question_fields)
+            except (ValueError, TypeError) as e:
+                importer.add_error(row_number, [str(e)])
+        importer.flush()
+        if not dry_run:
+            db.commit()
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.rollback()
+        raise ImportFormatError(f"Could not read the file: {e}")
+    except Exception:
+        db.rollback()
+        raise
+    return importer.result()
@@ -0,0 +1,76 @@
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload
+from ..core.cache import VersionedCache
+from ..core.config import settings
+from ..models.quiz import Quiz
+from ..schemas.quiz import QuizStudentRead
+
+def _etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+class StudentQuizPayload:
+    """Serialised student view of a quiz, ready to be sent as-is.
+
+    Quizzes that draw questions per attempt also keep the quiz fields and each
+    question separately, so an attempt's own questions can be assembled
+    without going back to the database.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        etag: str,
+        is_active: bool,
+        header: Optional[dict] = None,
+        questions: Optional[Dict[int, dict]] = None
+    ):
+        self.body = body
+        self.etag = etag
+        self.is_active = is_active
+        self.header = header
+        self.questions = questions
+
+    @property
+    def per_attempt(self) -> bool:
+        return self.questions is not None
+
+    def for_attempt(self, question_ids: Optional[List[int]]) -> Tuple[bytes, str]:
+        """Body and ETag showing only the questions drawn for an attempt, in
+        draw order (none when the student has no open attempt)"""
+        questions = [self.questions[question_id] for question_id in question_ids or [] if question_id in self.questions]
+        body = json.dumps({**self.header, "questions": questions}, separators=(",", ":")).encode("utf-8")
+        return body, _etag(body)
+
+# Student quiz payloads per (quiz id, version), bounded by LRU eviction
+student_payload_cache = VersionedCache(max_entries=settings.QUIZ_PAYLOAD_CACHE_SIZE)
+
+def build_student_quiz_payload(db: Session, quiz_id: int) -> Optional[StudentQuizPayload]:
+    """Serialise a quiz without answers or explanations"""
+    quiz = db.query(Quiz).options(selectinload(Quiz.questions)).filter(Quiz.id == quiz_id).first()
+    if not quiz:
+        return None
+
+    student_view = QuizStudentRead.model_validate(quiz)
+    body = student_view.model_dump_json().encode("utf-8")
+    if not quiz.questions_per_attempt:
+        return StudentQuizPayload(body, _etag(body), quiz.is_active)
+
+    data = student_view.model_dump(mode="json")
+    questions = {question["id"]: question for question in data.pop("questions")}
+    return StudentQuizPayload(body, _etag(body), quiz.is_active, header=data, questions=questions)
+
+def get_student_quiz_payload(db: Session, quiz_id: int) -> Optional[StudentQuizPayload]:
+    """Return the cached student payload for a quiz, building it on a miss"""
+    payload = student_payload_cache.get(quiz_id)
+    if payload is None:
+        version = student_payload_cache.version(quiz_id)
+        payload = build_student_quiz_payload(db, quiz_id)
+        if payload is not None:
+            student_payload_cache.set(quiz_id, payload, version)
+    return payload
+
+def invalidate_student_quiz_payload(quiz_id: int):
+    """Drop a quiz's cached student payload after the quiz changes"""
+    student_payload_cache.invalidate(quiz_id)
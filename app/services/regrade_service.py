@@ -0,0 +1,232 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased
+from ..core.database import SessionLocal
+from ..models.quiz import QuizAttempt, QuizSubmission, RegradeJob
+from ..models.performance import PerformanceRecord
+from .grading_service import AnswerKey, get_answer_key, grade_answer, invalidate_answer_key, quiz_recommendation
+from .item_analysis import item_analysis_cache
+from .leaderboard import leaderboards
+from .performance_stats import rebuild_performance_daily, rebuild_student_subject_stats
+from .stats_service import rebuild_quiz_stats
+
+# Completed attempts regraded per transaction
+REGRADE_CHUNK_SIZE = 500
+
+def queue_regrade(db: Session, quiz_id: int, requested_by: int) -> RegradeJob:
+    """Return the quiz's queued regrade, or queue a new one.
+
+    A running job keeps the answer key it started with, so an edit made while
+    it runs gets a fresh job that starts once the running one finishes.
+    """
+    job = db.query(RegradeJob).filter(
+        RegradeJob.quiz_id == quiz_id,
+        RegradeJob.status == "queued"
+    ).order_by(RegradeJob.id.desc()).first()
+    if job is None:
+        job = RegradeJob(quiz_id=quiz_id, requested_by=requested_by, status="queued")
+        db.add(job)
+        db.commit()
+    return job
+
+def _regrade_chunk(db: Session, key: AnswerKey, attempts) -> int:
+    """Regrade a chunk of completed attempts with bulk updates by primary key;
+    returns how many attempts changed"""
+    attempt_ids = [attempt.id for attempt in attempts]
+    submissions: Dict[int, list] = {}
+    for row in db.query(
+        QuizSubmission.id, QuizSubmission.attempt_id, QuizSubmission.question_id,
+        QuizSubmission.answer, QuizSubmission.is_correct, QuizSubmission.points_earned
+    ).filter(QuizSubmission.attempt_id.in_(attempt_ids)):
+        submissions.setdefault(row.attempt_id, []).append(row)
+    records = dict(db.query(PerformanceRecord.attempt_id, PerformanceRecord.max_score).filter(
+        PerformanceRecord.attempt_id.in_(attempt_ids)
+    ).all())
+
+    submission_updates: List[dict] = []
+    attempt_updates: List[dict] = []
+    record_updates: List[dict] = []
+
+    for attempt in attempts:
+        score = 0.0
+        answered = []
+        for submission in submissions.get(attempt.id, []):
+            result = grade_answer(key, submission.question_id, submission.answer)
+            if result is None:
+                # Question was removed from the quiz; it no longer counts
+                continue
+            is_correct, points_earned = result
+            score += points_earned
+            answered.append(submission.question_id)
+            if is_correct != submission.is_correct or points_earned != (submission.points_earned or 0.0):
+                submission_updates.append({
+                    "id": submission.id,
+                    "is_correct": is_correct,
+                    "points_earned": points_earned
+                })
+
+        # Attempts closed at their deadline are scored out of every question
+        # drawn for them, not only the answered ones
+        max_score = key.points_for(attempt.question_ids if attempt.counted_unanswered else answered)
+        old_max = records.get(attempt.id)
+        percentage = (score / max_score * 100) if max_score > 0 else 0
+        is_passed = percentage >= key.passing_score
+
+        if score == (attempt.score or 0.0) and is_passed == bool(attempt.is_passed) and old_max in (None, max_score):
+            continue
+
+        attempt_updates.append({"id": attempt.id, "score": score, "is_passed": is_passed})
+        if old_max is not None:
+            record_updates.append({
+                "attempt_id": attempt.id,
+                "score": score,
+                "max_score": max_score,
+                "percentage": percentage,
+                "recommendations": quiz_recommendation(key.subject, is_passed)
+            })
+
+    if submission_updates:
+        db.execute(update(QuizSubmission), submission_updates)
+    if attempt_updates:
+        db.execute(update(QuizAttempt), attempt_updates)
+    for values in record_updates:
+        db.execute(
+            update(PerformanceRecord)
+            .where(PerformanceRecord.attempt_id == values.pop("attempt_id"))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+    return len(attempt_updates)
+
+def _regrade_attempts(db: Session, job: RegradeJob, key: AnswerKey, completed_since: Optional[datetime] = None):
+    """Walk the quiz's completed attempts in id order, one transaction per chunk"""
+    last_id = 0
+    while True:
+        query = db.query(
+            QuizAttempt.id, QuizAttempt.score, QuizAttempt.is_passed, QuizAttempt.question_ids,
+            QuizAttempt.counted_unanswered
+        ).filter(
+            QuizAttempt.quiz_id == job.quiz_id,
+            QuizAttempt.completed_at != None,
+            QuizAttempt.id > last_id
+        )
+        if completed_since is not None:
+            query = query.filter(QuizAttempt.completed_at >= completed_since)
+        attempts = query.order_by(QuizAttempt.id).limit(REGRADE_CHUNK_SIZE).all()
+        if not attempts:
+            return
+
+        changed = _regrade_chunk(db, key, attempts)
+        if completed_since is None:
+            job.processed_attempts += len(attempts)
+        job.changed_attempts += changed
+        db.commit()
+        last_id = attempts[-1].id
+
+def run_regrade_job(job_id: int):
+    """Regrade every completed attempt of the job's quiz against its current key,
+    then run the quiz's next queued job, if any.
+
+    Only the caller that moves the job out of "queued" runs it, and only while
+    no other job for the quiz is running; that job picks this one up when it
+    finishes. Students can keep submitting: the answer key is invalidated
+    first so new submits grade against the new key, and attempts completed
+    while the job ran are swept again at the end. Regrading is idempotent, so
+    an interrupted job can be run again from the start.
+    """
+    while job_id is not None:
+        job_id = _run_regrade_job(job_id)
+
+def _run_regrade_job(job_id: int) -> Optional[int]:
+    """Run one job; returns the quiz's next queued job once this one ran"""
+    db = SessionLocal()
+    try:
+        started_at = datetime.now(timezone.utc)
+        running = aliased(RegradeJob)
+        claimed = db.execute(
+            update(RegradeJob)
+            .where(
+                RegradeJob.id == job_id,
+                RegradeJob.status == "queued",
+                ~select(running.id).where(
+                    running.quiz_id == RegradeJob.quiz_id,
+                    running.status == "running"
+                ).exists()
+            )
+            .values(status="running", started_at=started_at, processed_attempts=0, changed_attempts=0, error=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None
+
+        job = db.get(RegradeJob, job_id)
+        try:
+            invalidate_answer_key(job.quiz_id)
+            key = get_answer_key(db, job.quiz_id)
+            if key is None:
+                raise ValueError("Quiz no longer exists")
+
+            job.total_attempts = db.query(func.count(QuizAttempt.id)).filter(
+                QuizAttempt.quiz_id == job.quiz_id,
+                QuizAttempt.completed_at != None
+            ).scalar()
+            db.commit()
+
+            _regrade_attempts(db, job, key)
+            # Submits that graded with the old key before it was invalidated
+            _regrade_attempts(db, job, key, completed_since=started_at)
+            rebuild_quiz_stats(db, job.quiz_id)
+            rebuild_student_subject_stats(db, [
+                student_id for (student_id,) in db.query(QuizAttempt.student_id).filter(
+                    QuizAttempt.quiz_id == job.quiz_id,
+                    QuizAttempt.completed_at != None
+                ).distinct()
+            ])
+            if key.creator_id is not None:
+                rebuild_performance_daily(db, key.creator_id)
+            leaderboards.clear()
+            # Rewritten correctness leaves the cache fingerprint (attempt
+            # count, key version) unchanged
+            item_analysis_cache.pop(job.quiz_id)
+
+            job.status = "completed"
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            print(f"Regrade job {job_id} failed: {e}")
+
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        print(f"🔁 Regrade job {job_id} {job.status}: {job.changed_attempts} of {job.processed_attempts} attempts changed")
+
+        return db.query(RegradeJob.id).filter(
+            RegradeJob.quiz_id == job.quiz_id,
+            RegradeJob.status == "queued"
+        ).order_by(RegradeJob.id).limit(1).scalar()
+    finally:
+        db.close()
+
+def resume_regrade_jobs() -> int:
+    """Run jobs left queued, or interrupted mid-run, by a restart"""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(RegradeJob)
+            .where(RegradeJob.status == "running")
+            .values(status="queued")
+        )
+        db.commit()
+        job_ids = [
+            job_id for (job_id,) in db.query(RegradeJob.id)
+            .filter(RegradeJob.status == "queued")
+            .order_by(RegradeJob.id)
+        ]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        run_regrade_job(job_id)
+    return len(job_ids)
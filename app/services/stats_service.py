@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional
+from sqlalchemy import func, case, delete, insert, select, text
+from sqlalchemy.orm import Session
+from ..core.database import upsert_insert
+from ..models.quiz import Question, QuizAttempt, QuizSubmission, QuizStats, QuestionStats
+
+def record_quiz_result(
+    db: Session,
+    quiz_id: int,
+    score: float,
+    is_passed: bool,
+    time_taken: int,
+    answer_rows: List[dict]
+):
+    """Fold one completed attempt into the quiz/question rollups.
+
+    Runs inside the caller's transaction so the rollups commit together with
+    the attempt they describe.
+    """
+    stmt = upsert_insert(db, QuizStats).values(
+        quiz_id=quiz_id,
+        attempt_count=1,
+        score_sum=score,
+        pass_count=1 if is_passed else 0,
+        time_sum=time_taken or 0
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[QuizStats.quiz_id],
+        set_={
+            "attempt_count": QuizStats.attempt_count + stmt.excluded.attempt_count,
+            "score_sum": QuizStats.score_sum + stmt.excluded.score_sum,
+            "pass_count": QuizStats.pass_count + stmt.excluded.pass_count,
+            "time_sum": QuizStats.time_sum + stmt.excluded.time_sum,
+            "updated_at": func.now()
+        }
+    ))
+
+    # One row per question: ON CONFLICT cannot touch the same row twice
+    per_question: Dict[int, List[int]] = {}
+    for row in answer_rows:
+        if row["is_correct"] is None:
+            # Ungraded essay, nothing to count yet
+            continue
+        counts = per_question.setdefault(row["question_id"], [0, 0])
+        counts[0] += 1
+        counts[1] += 1 if row["is_correct"] else 0
+
+    if not per_question:
+        return
+
+    stmt = upsert_insert(db, QuestionStats).values([
+        {
+            "question_id": question_id,
+            "quiz_id": quiz_id,
+            "answer_count": answer_count,
+            "correct_count": correct_count
+        }
+        for question_id, (answer_count, correct_count) in per_question.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[QuestionStats.question_id],
+        set_={
+            "answer_count": QuestionStats.answer_count + stmt.excluded.answer_count,
+            "correct_count": QuestionStats.correct_count + stmt.excluded.correct_count
+        }
+    ))
+
+def rebuild_quiz_stats(db: Session, quiz_id: Optional[int] = None) -> dict:
+    """Recompute the quiz/question rollups from attempt history.
+
+    Rebuilds every quiz, or only ``quiz_id`` when given, and commits. Safe to
+    run while students are submitting.
+    """
+    delete_quiz_stats = delete(QuizStats)
+    delete_question_stats = delete(QuestionStats)
+    attempts = select(
+        QuizAttempt.quiz_id,
+        func.count(QuizAttempt.id),
+        func.coalesce(func.sum(QuizAttempt.score), 0.0),
+        func.sum(case((QuizAttempt.is_passed == True, 1), else_=0)),
+        func.coalesce(func.sum(QuizAttempt.time_taken), 0)
+    ).where(QuizAttempt.completed_at != None)
+    answers = select(
+        QuizSubmission.question_id,
+        Question.quiz_id,
+        func.count(QuizSubmission.id),
+        func.sum(case((QuizSubmission.is_correct == True, 1), else_=0))
+    ).join(Question, Question.id == QuizSubmission.question_id).where(QuizSubmission.is_correct != None)
+
+    if quiz_id is not None:
+        delete_quiz_stats = delete_quiz_stats.where(QuizStats.quiz_id == quiz_id)
+        delete_question_stats = delete_question_stats.where(QuestionStats.quiz_id == quiz_id)
+        attempts = attempts.where(QuizAttempt.quiz_id == quiz_id)
+        answers = answers.where(Question.quiz_id == quiz_id)
+
+    attempts = attempts.group_by(QuizAttempt.quiz_id)
+    answers = answers.group_by(QuizSubmission.question_id, Question.quiz_id)
+
+    if db.bind.dialect.name == "postgresql":
+        # Submits that already touched the rollups finish first; later ones wait
+        # for the rebuild, so no attempt is counted twice or missed
+        db.execute(text("LOCK TABLE quiz_stats, question_stats IN EXCLUSIVE MODE"))
+
+    db.execute(delete_question_stats)
+    db.execute(delete_quiz_stats)
+    quizzes = db.execute(insert(QuizStats).from_select(
+        ["quiz_id", "attempt_count", "score_sum", "pass_count", "time_sum"], attempts
+    )).rowcount
+    questions = db.execute(insert(QuestionStats).from_select(
+        ["question_id", "quiz_id", "answer_count", "correct_count"], answers
+    )).rowcount
+    db.commit()
+
+    return {"quizzes": quizzes, "questions": questions}
@@ -0,0 +1,218 @@
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import ObjectDeletedError, StaleDataError
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.quiz import QueuedSubmission
+from ..schemas.quiz import QuizSubmissionCreate
+from .grading_service import get_answer_key, grade_submissions, persist_attempt
+
+# Idle workers re-check the queue this often even without a notification
+IDLE_POLL_SECONDS = 30
+# Number of recent drain latencies kept for the metrics endpoint
+LATENCY_WINDOW = 500
+
+def _elapsed_ms(start: Optional[datetime], end: datetime) -> float:
+    """Milliseconds between two timestamps, treating naive values as UTC"""
+    if start is None:
+        return 0.0
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return max((end - start).total_seconds() * 1000, 0.0)
+
+class SubmissionQueue:
+    """Durable quiz submission queue drained by a fixed pool of worker threads.
+
+    Submissions are stored in the submission_queue table before the request
+    returns, so nothing is lost if the process restarts; jobs left in
+    "processing" by a previous process are put back in the queue on start.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._requeue_interrupted()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"submission-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"✅ Submission queue started with {self.workers} workers")
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def _requeue_interrupted(self):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(QueuedSubmission)
+                .where(QueuedSubmission.status == "processing")
+                .values(status="queued")
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Submission queue recovery skipped: {e}")
+        finally:
+            db.close()
+
+    # ---------- intake ----------
+
+    def enqueue(self, db: Session, quiz_id: int, student_id: int, answers: List[dict]) -> QueuedSubmission:
+        """Durably store a submission and wake a worker"""
+        job = QueuedSubmission(
+            receipt=uuid.uuid4().hex,
+            quiz_id=quiz_id,
+            student_id=student_id,
+            answers=answers,
+            status="queued"
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        with self._condition:
+            self._condition.notify()
+        return job
+
+    # ---------- workers ----------
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self._process_next()
+            except Exception as e:
+                print(f"Submission worker error: {e}")
+                processed = False
+            if not processed:
+                with self._condition:
+                    self._condition.wait(timeout=IDLE_POLL_SECONDS)
+
+    def _claim_next(self, db: Session) -> Optional[QueuedSubmission]:
+        query = db.query(QueuedSubmission.id).filter(
+            QueuedSubmission.status == "queued"
+        ).order_by(QueuedSubmission.id)
+        if db.bind.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        candidate = query.first()
+        if candidate is None:
+            db.rollback()
+            return None
+
+        # Only one worker can move a job out of "queued"
+        claimed = db.execute(
+            update(QueuedSubmission)
+            .where(QueuedSubmission.id == candidate.id, QueuedSubmission.status == "queued")
+            .values(status="processing")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None
+        return db.get(QueuedSubmission, candidate.id)
+
+    def _process_next(self) -> bool:
+        db = SessionLocal()
+        try:
+            job = self._claim_next(db)
+            if job is None:
+                return False
+            receipt, created_at = job.receipt, job.created_at
+
+            try:
+                answer_key = get_answer_key(db, job.quiz_id)
+                result = None
+                if answer_key is not None:
+                    graded = grade_submissions(
+                        answer_key, [QuizSubmissionCreate(**answer) for answer in job.answers]
+                    )
+                    result = persist_attempt(db, answer_key, job.student_id, graded, commit=False)
+
+                if result is None:
+                    job.status = "failed"
+                    job.error = "Quiz not found" if answer_key is None else "No active quiz attempt found"
+                else:
+                    job.status = "graded"
+                    job.result = result
+            except Exception as e:
+                db.rollback()
+                job.status = "failed"
+                job.error = "An error occurred while grading your quiz."
+                print(f"Submission {receipt} failed: {e}")
+
+            completed_at = datetime.now(timezone.utc)
+            job.completed_at = completed_at
+            try:
+                db.commit()
+            except (StaleDataError, ObjectDeletedError):
+                # The quiz was deleted while the job was being graded, and the
+                # job with it
+                db.rollback()
+                self.failed += 1
+                print(f"Submission {receipt} dropped: its quiz was deleted")
+                return True
+
+            self._latencies.append(_elapsed_ms(created_at, completed_at))
+            if job.status == "graded":
+                self.processed += 1
+            else:
+                self.failed += 1
+            return True
+        finally:
+            db.close()
+
+    # ---------- metrics ----------
+
+    def metrics(self, db: Session) -> dict:
+        counts = dict(
+            db.query(QueuedSubmission.status, func.count(QueuedSubmission.id))
+            .filter(QueuedSubmission.status.in_(["queued", "processing"]))
+            .group_by(QueuedSubmission.status)
+            .all()
+        )
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)], 2)
+
+        return {
+            "mode": settings.SUBMISSION_INTAKE_MODE,
+            "workers": self.workers,
+            "running": bool(self._threads),
+            "queue_depth": counts.get("queued", 0),
+            "in_progress": counts.get("processing", 0),
+            "processed": self.processed,
+            "failed": self.failed,
+            "drain_latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 2) if latencies else 0.0
+            }
+        }
+
+submission_queue = SubmissionQueue(workers=settings.SUBMISSION_WORKERS)
@@ -0,0 +1,79 @@
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..models.assignment import Assignment, AssignmentSubmission
+from ..models.performance import PerformanceRecord
+from ..models.quiz import Quiz, QuizAttempt
+from ..models.user import User
+
+# Overview per teacher id; dropped on the teacher's own writes, otherwise
+# refreshed every TEACHER_OVERVIEW_CACHE_SECONDS to pick up student activity
+teacher_overview_cache = TTLCache(
+    ttl_seconds=settings.TEACHER_OVERVIEW_CACHE_SECONDS,
+    max_entries=settings.TEACHER_OVERVIEW_CACHE_SIZE
+)
+
+def compute_teacher_overview(db: Session, teacher_id: int) -> dict:
+    """Dashboard counts for one teacher in a single round trip.
+
+    Each figure is a scalar subquery scoped to the teacher's own students,
+    quizzes and assignments, so the cost does not grow with the rest of the
+    platform.
+    """
+    teacher_quizzes = select(Quiz.id).where(Quiz.creator_id == teacher_id)
+    teacher_assignments = select(Assignment.id).where(Assignment.creator_id == teacher_id)
+
+    row = db.execute(select(
+        select(func.count(User.id)).where(
+            User.tutor_id == teacher_id,
+            User.role == "student",
+            User.is_active == True
+        ).scalar_subquery(),
+        select(func.count(Quiz.id)).where(
+            Quiz.creator_id == teacher_id,
+            Quiz.is_active == True
+        ).scalar_subquery(),
+        select(func.count(Assignment.id)).where(
+            Assignment.creator_id == teacher_id,
+            Assignment.is_active == True
+        ).scalar_subquery(),
+        select(func.count(QuizAttempt.id)).where(
+            QuizAttempt.quiz_id.in_(teacher_quizzes),
+            QuizAttempt.completed_at != None
+        ).scalar_subquery(),
+        select(func.count(AssignmentSubmission.id)).where(
+            AssignmentSubmission.assignment_id.in_(teacher_assignments)
+        ).scalar_subquery(),
+        # Results on the teacher's quizzes and assignments
+        select(func.avg(PerformanceRecord.percentage)).where(or_(
+            and_(PerformanceRecord.assessment_type == "quiz", PerformanceRecord.assessment_id.in_(teacher_quizzes)),
+            and_(PerformanceRecord.assessment_type == "assignment", PerformanceRecord.assessment_id.in_(teacher_assignments))
+        )).scalar_subquery()
+    )).one()
+
+    students, quizzes, assignments, quiz_attempts, assignment_submissions, average = row
+    return {
+        "total_students": students,
+        "total_quizzes": quizzes,
+        "total_assignments": assignments,
+        "recent_quiz_attempts": quiz_attempts,
+        "recent_assignment_submissions": assignment_submissions,
+        "average_performance": round(average or 0, 2),
+        "recent_activity": [],
+        "subject_breakdown": {}
+    }
+
+def get_overview_for_teacher(db: Session, teacher_id: int) -> dict:
+    """Return the cached overview for a teacher, recomputing it when stale"""
+    overview = teacher_overview_cache.get(teacher_id)
+    if overview is None:
+        version = teacher_overview_cache.version(teacher_id)
+        overview = compute_teacher_overview(db, teacher_id)
+        teacher_overview_cache.set(teacher_id, overview, version)
+    return overview
+
+def invalidate_teacher_overview(teacher_id: int):
+    """Drop a teacher's overview after they change their quizzes, assignments
+    or students"""
+    teacher_overview_cache.invalidate(teacher_id)
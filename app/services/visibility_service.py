@@ -0,0 +1,61 @@
+from typing import FrozenSet
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import Session
+from ..core.cache import LRUCache
+from ..core.config import settings
+from ..models.quiz import Quiz
+from ..models.subject import Grade, StudentGrade
+
+# Quiz ids each student may see, keyed by student id
+visibility_cache = LRUCache(max_entries=settings.VISIBILITY_CACHE_SIZE)
+
+# Bumped on every invalidation so a load that overlaps one is not cached
+_generation = 0
+
+def load_visible_quiz_ids(db: Session, student_id: int) -> FrozenSet[int]:
+    """Resolve the quizzes a student can see in a single query.
+
+    A quiz is visible when it targets one of the student's active grades, the
+    subject of one of those grades, or has no grade/subject at all.
+    """
+    enrolled_grades = select(StudentGrade.grade_id).where(
+        StudentGrade.student_id == student_id,
+        StudentGrade.is_active == True
+    )
+    enrolled_subjects = select(Grade.subject_id).join(
+        StudentGrade, StudentGrade.grade_id == Grade.id
+    ).where(
+        StudentGrade.student_id == student_id,
+        StudentGrade.is_active == True
+    )
+
+    rows = db.query(Quiz.id).filter(
+        or_(
+            Quiz.grade_id.in_(enrolled_grades),
+            Quiz.subject_id.in_(enrolled_subjects),
+            and_(Quiz.grade_id == None, Quiz.subject_id == None)
+        )
+    ).all()
+    return frozenset(row[0] for row in rows)
+
+def get_visible_quiz_ids(db: Session, student_id: int) -> FrozenSet[int]:
+    """Return the cached visible quiz ids for a student, loading on a miss"""
+    quiz_ids = visibility_cache.get(student_id)
+    if quiz_ids is None:
+        generation = _generation
+        quiz_ids = load_visible_quiz_ids(db, student_id)
+        if generation == _generation:
+            visibility_cache.set(student_id, quiz_ids)
+    return quiz_ids
+
+def invalidate_student_visibility(student_id: int):
+    """Forget one student's visible quizzes after their enrolments change"""
+    global _generation
+    _generation += 1
+    visibility_cache.pop(student_id)
+
+def invalidate_all_visibility():
+    """Forget every student's visible quizzes after a quiz is added or changed"""
+    global _generation
+    _generation += 1
+    visibility_cache.clear()
@@ -0,0 +1,11 @@
+"""Point the in-process tests at a throwaway SQLite database.
+
+The engine is created on the first import of the app, so this has to happen
+before any test module imports it; a module that only imports models would
+otherwise connect to the configured database.
+"""
+
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}"
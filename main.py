@@ -1,5 +1,6 @@
 import sys
 import os
+import threading
 from pathlib import Path
 
 # Add the current directory to Python path
@@ -71,6 +72,34 @@ app.include_router(assessment.router, prefix="/api/assessments", tags=["Assessme
 app.include_router(ai_studio.router, prefix="/api/ai_studio", tags=["AI Studio"])
 
 from fastapi.responses import FileResponse
+from app.services.submission_queue import submission_queue
+from app.services.deadline_scheduler import deadline_scheduler
+from app.services.autosave_buffer import autosave_buffer
+from app.services.notification_outbox import process_pending_outbox
+from app.services.regrade_service import resume_regrade_jobs
+
+@app.on_event("startup")
+def start_background_workers():
+    try:
+        submission_queue.start()
+    except Exception as e:
+        print(f"Warning: Could not start submission queue: {e}")
+    try:
+        deadline_scheduler.start()
+    except Exception as e:
+        print(f"Warning: Could not start deadline scheduler: {e}")
+    autosave_buffer.start()
+    # Deliver notifications whose background task was lost to a restart
+    threading.Thread(target=process_pending_outbox, name="outbox-recovery", daemon=True).start()
+    # Finish regrades interrupted by a restart
+    threading.Thread(target=resume_regrade_jobs, name="regrade-recovery", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    submission_queue.stop()
+    deadline_scheduler.stop()
+    # Write answers still buffered before exiting
+    autosave_buffer.stop()
 
 @app.get("/")
 def read_root():
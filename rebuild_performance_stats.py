@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rebuild the performance rollups from performance records:
+student_subject_stats (per student and subject) and performance_daily (per
+teacher, subject and day).
+
+Quiz submits and assignment grading keep the rollups up to date, and
+POST /api/migration/migrate-performance backfills them after upgrading; run
+this after importing historical data, or if the rollups are ever suspected to
+have drifted.
+
+Usage:
+    python rebuild_performance_stats.py             # every rollup
+    python rebuild_performance_stats.py students    # only student_subject_stats
+    python rebuild_performance_stats.py daily       # only performance_daily
+"""
+
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal, Base, engine, import_models
+from app.services.performance_stats import rebuild_performance_daily, rebuild_student_subject_stats
+
+ROLLUPS = {
+    "students": ("student/subject", rebuild_student_subject_stats),
+    "daily": ("teacher/subject/day", rebuild_performance_daily),
+}
+
+def main():
+    names = sys.argv[1:] or list(ROLLUPS)
+    unknown = [name for name in names if name not in ROLLUPS]
+    if unknown:
+        print(f"❌ Unknown rollup: {', '.join(unknown)} (choose from {', '.join(ROLLUPS)})")
+        sys.exit(1)
+
+    import_models()
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        for name in names:
+            label, rebuild = ROLLUPS[name]
+            rows = rebuild(db)
+            print(f"✅ Rebuilt {name} rollup: {rows} {label} rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Rebuild failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
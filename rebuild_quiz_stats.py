@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the quiz_stats / question_stats rollups from attempt history.
+
+submit_quiz keeps the rollups up to date; run this after importing historical
+data, after a regrade, or if the rollups are ever suspected to have drifted.
+
+Usage:
+    python rebuild_quiz_stats.py            # every quiz
+    python rebuild_quiz_stats.py 42         # only quiz 42
+"""
+
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal, Base, engine, import_models
+from app.services.stats_service import rebuild_quiz_stats
+
+def main():
+    quiz_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    import_models()
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        result = rebuild_quiz_stats(db, quiz_id)
+        scope = f"quiz {quiz_id}" if quiz_id is not None else "all quizzes"
+        print(f"✅ Rebuilt rollups for {scope}: {result['quizzes']} quiz rows, {result['questions']} question rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Rebuild failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
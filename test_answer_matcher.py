@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Answer matcher test.
+Checks that numeric short answers are compared as numbers, so a flipped sign
+or a stray percent sign is not accepted as the same text.
+"""
+
+from app.models.quiz import QuestionType
+from app.services.answer_matcher import AnswerMatcher
+
+def test_numeric_answer_keeps_its_sign():
+    """"-5" is not "5", and the other way round"""
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "5").score("-5") == 0.0
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "-5").score("5") == 0.0
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "-5").score("-5") == 1.0
+
+def test_numeric_answer_keeps_its_percent():
+    """"5%" is 0.05, not 5; "50%" and "0.5" are the same number"""
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "5").score("5%") == 0.0
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "50%").score("50") == 0.0
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "50%").score("0.5") == 1.0
+
+def test_numeric_answer_forms():
+    """Formatting of the same number is still accepted"""
+    matcher = AnswerMatcher(QuestionType.SHORT_ANSWER, "1,000")
+    assert [matcher.score(answer) for answer in ("1000", "1,000", " 1000.0 ")] == [1.0, 1.0, 1.0]
+    assert AnswerMatcher(QuestionType.SHORT_ANSWER, "Route 66").score("route-66") == 1.0
+
+if __name__ == "__main__":
+    test_numeric_answer_keeps_its_sign()
+    test_numeric_answer_keeps_its_percent()
+    test_numeric_answer_forms()
+    print("\n🎉 Answer matcher test passed!")
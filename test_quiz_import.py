@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Quiz import test.
+Runs the app in-process against a throwaway SQLite database and uploads an
+XLSX workbook in the CSV column layout, checking valid rows are imported and
+invalid ones reported.
+"""
+
+import io
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "quiz_import.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+from main import app
+
+client = TestClient(app)
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def register_and_login(name, role):
+    """Register a throwaway user and return auth headers"""
+    email = f"{name}@example.com"
+    password = "testpassword123"
+    client.post("/api/auth/register", json={"name": name, "email": email, "password": password, "role": role})
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def build_workbook(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def test_xlsx_import():
+    """Two quizzes from one sheet; the row without a correct answer is reported"""
+    teacher_headers = register_and_login("import_teacher", "teacher")
+    content = build_workbook([
+        ["Quiz Title", "Subject", "Text", "Question Type", "Options", "Correct Answer", "Points"],
+        ["Networks", "CAT", "What does LAN stand for?", "short_answer", None, "Local Area Network", 2],
+        ["Networks", "CAT", "Is TCP connection oriented?", "true_false", "True|False", "True", 1],
+        ["Hardware", "CAT", "Which is volatile?", "multiple_choice", "RAM|ROM", "RAM", 1],
+        ["Hardware", "CAT", "Missing its answer", "multiple_choice", "RAM|ROM", None, 1],
+    ])
+
+    response = client.post(
+        "/api/quizzes/import",
+        headers=teacher_headers,
+        files={"file": ("quizzes.xlsx", content, XLSX_CONTENT_TYPE)}
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["quizzes_created"] == 2
+    assert result["questions_created"] == 3
+    assert result["error_count"] == 1
+    assert [error["row"] for error in result["errors"]] == [5]
+
+    titles = sorted(quiz["title"] for quiz in client.get("/api/quizzes/", headers=teacher_headers).json())
+    assert titles == ["Hardware", "Networks"]
+
+if __name__ == "__main__":
+    test_xlsx_import()
+    print("\n🎉 Quiz import test passed!")
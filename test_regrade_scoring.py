@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Regrade scoring test.
+Runs the app in-process against a throwaway SQLite database, changes question
+points after attempts were scored and checks each attempt keeps the
+denominator it was scored with: the answered questions for a normal submit,
+every drawn question for an attempt closed at its deadline.
+"""
+
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "regrade_scoring.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from fastapi.testclient import TestClient
+from main import app
+from app.core.database import SessionLocal
+from app.models.performance import PerformanceRecord
+from app.services.autosave_buffer import autosave_buffer
+from app.services.deadline_scheduler import deadline_scheduler
+
+client = TestClient(app)
+
+def register_and_login(name, role):
+    """Register a throwaway user and return auth headers"""
+    email = f"{name}@example.com"
+    password = "testpassword123"
+    client.post("/api/auth/register", json={"name": name, "email": email, "password": password, "role": role})
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def create_quiz(teacher_headers, title):
+    """Three 2-point questions, answer "a"; returns (quiz id, question ids)"""
+    response = client.post("/api/quizzes/", headers=teacher_headers, json={
+        "title": title,
+        "subject": "CAT",
+        "time_limit": 10,
+        "questions": [
+            {"text": f"Q{i}", "question_type": "multiple_choice", "options": ["a", "b"], "correct_answer": "a", "points": 2}
+            for i in range(3)
+        ]
+    })
+    response.raise_for_status()
+    quiz = response.json()
+    return quiz["id"], [question["id"] for question in quiz["questions"]]
+
+def set_points(teacher_headers, quiz_id, question_id, points):
+    """Change a question's points; the regrade runs as a background task"""
+    response = client.put(f"/api/quizzes/{quiz_id}/questions/{question_id}", headers=teacher_headers, json={"points": points})
+    response.raise_for_status()
+
+def percentage_of(attempt_id):
+    db = SessionLocal()
+    try:
+        return db.query(PerformanceRecord.percentage).filter(PerformanceRecord.attempt_id == attempt_id).scalar()
+    finally:
+        db.close()
+
+def test_lowered_points_keep_answered_denominator():
+    """A submitted attempt that skipped a question stays scored over its answers"""
+    teacher_headers = register_and_login("regrade_teacher_a", "teacher")
+    student_headers = register_and_login("regrade_student_a", "student")
+    quiz_id, question_ids = create_quiz(teacher_headers, "Lowered Points")
+
+    attempt_id = client.post(f"/api/quizzes/{quiz_id}/start", headers=student_headers).json()["attempt_id"]
+    response = client.post(f"/api/quizzes/{quiz_id}/submit", headers=student_headers, json=[
+        {"question_id": question_id, "answer": "a"} for question_id in question_ids[:2]
+    ])
+    response.raise_for_status()
+    assert response.json()["percentage"] == 100
+
+    set_points(teacher_headers, quiz_id, question_ids[0], 1)
+    assert percentage_of(attempt_id) == 100
+
+def test_raised_points_keep_drawn_denominator():
+    """An attempt closed at its deadline stays scored over every question"""
+    teacher_headers = register_and_login("regrade_teacher_b", "teacher")
+    student_headers = register_and_login("regrade_student_b", "student")
+    quiz_id, question_ids = create_quiz(teacher_headers, "Raised Points")
+
+    attempt_id = client.post(f"/api/quizzes/{quiz_id}/start", headers=student_headers).json()["attempt_id"]
+    client.put(
+        f"/api/quizzes/{quiz_id}/attempts/{attempt_id}/answers",
+        headers=student_headers,
+        json=[{"question_id": question_ids[0], "answer": "a"}]
+    ).raise_for_status()
+    autosave_buffer.flush()
+    deadline_scheduler.expire([attempt_id])
+    assert round(percentage_of(attempt_id), 2) == 33.33
+
+    set_points(teacher_headers, quiz_id, question_ids[0], 10)
+    assert round(percentage_of(attempt_id), 2) == 71.43
+
+if __name__ == "__main__":
+    test_lowered_points_keep_answered_denominator()
+    test_raised_points_keep_drawn_denominator()
+    print("\n🎉 Regrade scoring test passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for starting a quiz attempt.
+Fires many parallel start requests for the same student and quiz and checks
+that they all land on a single open attempt.
+"""
+
+import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration
+BASE_URL = "http://localhost:8000"  # Change to your Railway URL for production testing
+API_BASE = f"{BASE_URL}/api"
+PARALLEL_STARTS = 25
+
+def register_and_login(name, role, suffix):
+    """Register a throwaway user and return auth headers"""
+    email = f"{name}.{suffix}@example.com"
+    password = "testpassword123"
+    requests.post(f"{API_BASE}/auth/register", json={
+        "name": name,
+        "email": email,
+        "password": password,
+        "role": role
+    })
+    response = requests.post(f"{API_BASE}/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def create_quiz(teacher_headers):
+    """Create a small active quiz and return its id"""
+    response = requests.post(f"{API_BASE}/quizzes/", headers=teacher_headers, json={
+        "title": "Concurrent Start Test",
+        "subject": "CAT",
+        "questions": [{
+            "text": "What does CPU stand for?",
+            "question_type": "multiple_choice",
+            "options": ["Central Processing Unit", "Computer Personal Unit"],
+            "correct_answer": "Central Processing Unit",
+            "points": 1
+        }]
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+def test_parallel_starts_share_one_attempt():
+    """Parallel starts by one student must all return the same attempt"""
+    print("\nTesting parallel quiz starts...")
+
+    try:
+        suffix = int(time.time() * 1000)
+        teacher_headers = register_and_login("concurrency_teacher", "teacher", suffix)
+        student_headers = register_and_login("concurrency_student", "student", suffix)
+        quiz_id = create_quiz(teacher_headers)
+
+        def start(_):
+            return requests.post(f"{API_BASE}/quizzes/{quiz_id}/start", headers=student_headers)
+
+        with ThreadPoolExecutor(max_workers=PARALLEL_STARTS) as executor:
+            responses = list(executor.map(start, range(PARALLEL_STARTS)))
+
+        statuses = {response.status_code for response in responses}
+        if statuses != {200}:
+            print(f"❌ Unexpected status codes: {statuses}")
+            return False
+
+        attempt_ids = {response.json()["attempt_id"] for response in responses}
+        created = sum(
+            response.json()["message"] == "Quiz attempt started successfully" for response in responses
+        )
+        if len(attempt_ids) != 1 or created != 1:
+            print(f"❌ Expected one attempt, got ids {attempt_ids} ({created} reported as created)")
+            return False
+
+        print(f"✅ {PARALLEL_STARTS} parallel starts returned attempt {attempt_ids.pop()}")
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = test_parallel_starts_share_one_attempt()
+    print("\n🎉 Concurrency test passed!" if success else "\n❌ Concurrency test failed")